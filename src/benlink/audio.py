@@ -35,6 +35,7 @@ from . import protocol as p
 class AudioConnection:
     _link: AudioLink
     _handlers: list[t.Callable[[AudioMessage], None]]
+    _batch_handlers: list[t.Callable[[t.List[AudioMessage]], None]]
 
     def is_connected(self) -> bool:
         return self._link.is_connected()
@@ -45,6 +46,7 @@ class AudioConnection:
     ):
         self._link = link
         self._handlers = []
+        self._batch_handlers = []
 
     @classmethod
     def new_rfcomm(cls, device_uuid: str, channel: int | t.Literal["auto"] = "auto") -> AudioConnection:
@@ -58,6 +60,19 @@ class AudioConnection:
                 handler(msg)
         return self._add_message_handler(on_message)
 
+    def add_event_batch_handler(self, handler: t.Callable[[t.List[AudioEvent]], None]) -> t.Callable[[], None]:
+        def on_batch(msgs: t.List[AudioMessage]):
+            events = [msg for msg in msgs if isinstance(msg, AudioEvent)]
+            if events:
+                handler(events)
+
+        def remove_handler():
+            self._batch_handlers.remove(on_batch)
+
+        self._batch_handlers.append(on_batch)
+
+        return remove_handler
+
     def _add_message_handler(self, handler: t.Callable[[AudioMessage], None]) -> t.Callable[[], None]:
         def remove_handler():
             self._handlers.remove(handler)
@@ -69,6 +84,9 @@ class AudioConnection:
     async def send_message(self, msg: AudioMessage) -> None:
         await self._link.send(audio_message_to_protocol(msg))
 
+    async def send_messages(self, msgs: t.Sequence[AudioMessage]) -> None:
+        await self._link.send_many([audio_message_to_protocol(msg) for msg in msgs])
+
     async def send_message_expect_reply(self, msg: AudioMessage, reply: t.Type[AudioMessageT]) -> AudioMessageT:
         queue: asyncio.Queue[AudioMessageT] = asyncio.Queue()
 
@@ -87,10 +105,14 @@ class AudioConnection:
         return out
 
     async def connect(self) -> None:
-        def on_msg(msg: p.AudioMessage):
+        def on_batch(batch: t.List[p.AudioMessage]):
+            msgs = [audio_message_from_protocol(msg) for msg in batch]
+            for handler in self._batch_handlers:
+                handler(msgs)
             for handler in self._handlers:
-                handler(audio_message_from_protocol(msg))
-        await self._link.connect(on_msg)
+                for msg in msgs:
+                    handler(msg)
+        await self._link.connect_batch(on_batch)
 
     async def disconnect(self) -> None:
         await self._link.disconnect()
@@ -101,6 +123,10 @@ class AudioConnection:
         # Radio does not send an ack for audio data
         await self.send_message(AudioData(sbc_data))
 
+    async def send_audio_data_many(self, sbc_frames: t.Sequence[bytes]) -> None:
+        # Coalesces the frames into a single write
+        await self.send_messages([AudioData(sbc_data) for sbc_data in sbc_frames])
+
     async def send_audio_end(self) -> None:
         # Radio does not send an ack for audio end
         await self.send_message(AudioEnd())
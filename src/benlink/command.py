@@ -35,6 +35,9 @@ for functions that take keyword arguments to set these parameters.
 from __future__ import annotations
 import typing as t
 import asyncio
+from collections import deque
+from dataclasses import dataclass
+import itertools
 from pydantic import BaseModel, ConfigDict
 from . import protocol as p
 from .link import CommandLink, BleCommandLink, RfcommCommandLink
@@ -52,27 +55,55 @@ RADIO_INDICATE_UUID = "00001102-d102-11e1-9b23-00025b00a5a5"
 
 class CommandConnection:
     _link: CommandLink
-    _handlers: t.List[RadioMessageHandler] = []
-
-    def __init__(self, link: CommandLink):
+    _handlers: t.Dict[t.Type[RadioMessage], t.Dict[int, RadioMessageHandler]]
+    _handler_ids: t.Iterator[int]
+    _pending_replies: t.Dict[ReplyKey, t.Deque[PendingReply]]
+    _max_in_flight: int
+    _in_flight: t.Dict[ReplyKey, asyncio.Semaphore]
+    _event_streams: t.Set[EventStream]
+    _reply_timeout: float | None
+    reply_metrics: ReplyMetrics
+
+    def __init__(
+        self,
+        link: CommandLink,
+        max_in_flight: int = 4,
+        reply_timeout: float | None = 10.0,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
         self._link = link
-        self._handlers = []
+        self._handlers = {}
+        self._handler_ids = itertools.count()
+        self._pending_replies = {}
+        self._max_in_flight = max_in_flight
+        self._in_flight = {}
+        self._event_streams = set()
+        self._reply_timeout = reply_timeout
+        self.reply_metrics = ReplyMetrics()
 
     @classmethod
     def new_ble(cls, device_uuid: str) -> CommandConnection:
         return cls(BleCommandLink(device_uuid))
 
     @classmethod
-    def new_rfcomm(cls, device_uuid: str, channel: int | t.Literal["auto"] = "auto") -> CommandConnection:
-        return cls(RfcommCommandLink(device_uuid, channel))
+    def new_rfcomm(
+        cls,
+        device_uuid: str,
+        channel: int | t.Literal["auto"] = "auto",
+        checksum: bool = False,
+    ) -> CommandConnection:
+        return cls(RfcommCommandLink(device_uuid, channel, checksum=checksum))
 
     def is_connected(self) -> bool:
         return self._link.is_connected()
 
     async def connect(self) -> None:
-        await self._link.connect(self._on_recv)
+        await self._link.connect(self._on_recv, self._wants_message)
 
     async def disconnect(self) -> None:
+        for stream in list(self._event_streams):
+            stream.close()
         self._handlers.clear()
         await self._link.disconnect()
 
@@ -82,48 +113,224 @@ class CommandConnection:
     async def send_message(self, command: CommandMessage) -> None:
         await self._link.send(command_message_to_protocol(command))
 
-    async def send_message_expect_reply(self, command: CommandMessage, expect: t.Type[RadioMessageT]) -> RadioMessageT | MessageReplyError:
-        queue: asyncio.Queue[RadioMessageT |
-                             MessageReplyError] = asyncio.Queue()
-
-        def reply_handler(reply: RadioMessage):
-            if (
-                isinstance(reply, expect) or
-                (
-                    isinstance(reply, MessageReplyError) and
-                    reply.message_type is expect
-                )
-            ):
-                queue.put_nowait(reply)
-
-        remove_handler = self._add_message_handler(reply_handler)
-
-        await self.send_message(command)
-
-        out = await queue.get()
-
-        remove_handler()
+    async def send_message_expect_reply(
+        self,
+        command: CommandMessage,
+        expect: t.Type[RadioMessageT],
+        timeout: float | None | t.Literal["default"] = "default",
+    ) -> RadioMessageT | MessageReplyError:
+        """Send a command and wait for its reply
+
+        Raises `ReplyTimeoutError` if no reply arrives within `timeout` seconds
+        (by default, the connection's `reply_timeout`; None waits forever).
+        """
+        if timeout == "default":
+            timeout = self._reply_timeout
+
+        proto = command_message_to_protocol(command)
+        key = (proto.command_group, proto.command)
+
+        window = self._in_flight.get(key)
+        if window is None:
+            window = self._in_flight[key] = asyncio.Semaphore(self._max_in_flight)
+
+        # Up to max_in_flight requests of each command are sent before
+        # their replies arrive
+        async with window:
+            future: asyncio.Future[RadioMessage] = asyncio.get_running_loop().create_future()
+            pending = PendingReply(expect, future, _request_item_id(command))
+
+            # Replies to the same command are matched to requests in the order
+            # the requests were sent
+            self._pending_replies.setdefault(key, deque()).append(pending)
+
+            try:
+                await self._link.send(proto)
+                pending.sent = True
+                reply = await asyncio.wait_for(future, timeout)
+                return t.cast(RadioMessageT | MessageReplyError, reply)
+            except asyncio.TimeoutError:
+                if pending.held is not None:
+                    # Timed out while deciding whether the held reply is its own
+                    reply = pending.held
+                    self._remove_pending_reply(key, pending)
+                    return t.cast(RadioMessageT | MessageReplyError, reply)
+                self.reply_metrics.timeouts += 1
+                self._abandon_pending_reply(key, pending, timeout)
+                raise ReplyTimeoutError(command, timeout) from None
+            except asyncio.CancelledError:
+                self.reply_metrics.cancellations += 1
+                self._abandon_pending_reply(key, pending, self._reply_timeout)
+                raise
+            finally:
+                if not future.done():
+                    self._remove_pending_reply(key, pending)
+
+    def _abandon_pending_reply(
+        self, key: ReplyKey, pending: PendingReply, lifetime: float | None
+    ) -> None:
+        pending.future.cancel()
+        pending.release_held()
+
+        # A request that never went out won't get a reply
+        if lifetime is None or not pending.sent:
+            self._remove_pending_reply(key, pending)
+            return
+
+        # The reply may still arrive, so the request keeps its place in line
+        # for a while; its late reply is then dropped, rather than matched
+        # to the request after it
+        pending.abandoned = True
+        asyncio.get_running_loop().call_later(
+            lifetime, self._remove_pending_reply, key, pending
+        )
 
-        return out
+    def _remove_pending_reply(self, key: ReplyKey, pending: PendingReply) -> None:
+        waiters = self._pending_replies.get(key)
+
+        if waiters is None:
+            return
+
+        try:
+            waiters.remove(pending)
+        except ValueError:
+            pass
+
+        if not waiters:
+            del self._pending_replies[key]
+
+    def _dispatch_reply(self, key: ReplyKey, reply: RadioMessage, item_id: int | None) -> None:
+        waiters = self._pending_replies.get(key)
+
+        if waiters is None:
+            # Unsolicited, or its request was given up on a while ago
+            self.reply_metrics.orphaned_replies += 1
+            return
+
+        for i, pending in enumerate(waiters):
+            if not pending.accepts(reply, item_id):
+                continue
+
+            del waiters[i]
+
+            if pending.abandoned:
+                # Most likely a late reply to a request that timed out or was
+                # cancelled. Unless the reply says which item it is for, it
+                # may also be the reply to the next request, if the late reply
+                # was lost. That request then holds on to it for a moment: if
+                # another reply follows, this one was the late reply
+                following = None if item_id is not None else next((
+                    other for other in itertools.islice(waiters, i, None)
+                    if not other.abandoned and other.accepts(reply, item_id)
+                ), None)
+
+                if following is None or following.held is not None:
+                    self.reply_metrics.orphaned_replies += 1
+                else:
+                    following.held = reply
+                    following.held_handle = asyncio.get_running_loop().call_later(
+                        LATE_REPLY_GRACE, self._release_held_reply, key, following
+                    )
+            else:
+                if pending.held is not None:
+                    # The held reply was the late reply after all
+                    self.reply_metrics.orphaned_replies += 1
+                    pending.release_held()
+                if not pending.future.done():
+                    pending.future.set_result(reply)
+
+            if not waiters:
+                del self._pending_replies[key]
+            return
+
+        self.reply_metrics.orphaned_replies += 1
+
+    def _release_held_reply(self, key: ReplyKey, pending: PendingReply) -> None:
+        # No other reply followed, so the held reply was this request's own
+        reply = pending.held
+        pending.release_held()
+        if reply is None or pending.future.done():
+            return
+        self._remove_pending_reply(key, pending)
+        pending.future.set_result(reply)
+
+    def add_event_handler(
+        self,
+        handler: EventHandler,
+        event_types: t.Iterable[t.Type[EventMessage]] | None = None,
+    ) -> t.Callable[[], None]:
+        """Register an event handler, optionally only for the given event message types
+
+        Events that no handler is registered for are dropped without being decoded.
+        """
+        return self._add_message_handler(
+            t.cast(RadioMessageHandler, handler),
+            EVENT_MESSAGE_TYPES if event_types is None else event_types,
+        )
 
-    def add_event_handler(self, handler: EventHandler) -> t.Callable[[], None]:
-        def event_handler(msg: RadioMessage):
-            if isinstance(msg, EventMessage):
-                handler(msg)
-        return self._add_message_handler(event_handler)
+    def events(
+        self,
+        types: t.Iterable[t.Type[EventMessage]] | None = None,
+        maxsize: int = 64,
+        overflow: EventOverflowPolicy = "drop_oldest",
+    ) -> EventStream:
+        """Stream events (optionally only the given event message types) through a bounded queue"""
+        def on_close():
+            remove_handler()
+            self._event_streams.discard(stream)
+
+        stream = EventStream(maxsize, overflow, on_close)
+        remove_handler = self.add_event_handler(stream._put, types)
+        self._event_streams.add(stream)
+
+        return stream
+
+    def _add_message_handler(
+        self,
+        handler: RadioMessageHandler,
+        message_types: t.Iterable[t.Type[RadioMessage]],
+    ) -> t.Callable[[], None]:
+        # Handlers are registered per message class under an id, so they
+        # can be looked up by the type of a message and removed in O(1)
+        handler_id = next(self._handler_ids)
+        message_types = tuple(dict.fromkeys(message_types))
 
-    def _add_message_handler(self, handler: RadioMessageHandler) -> t.Callable[[], None]:
-        self._handlers.append(handler)
+        for message_type in message_types:
+            self._handlers.setdefault(message_type, {})[handler_id] = handler
 
         def remove_handler():
-            self._handlers.remove(handler)
+            for message_type in message_types:
+                handlers = self._handlers.get(message_type)
+                if handlers is None:
+                    continue
+                handlers.pop(handler_id, None)
+                if not handlers:
+                    del self._handlers[message_type]
 
         return remove_handler
 
+    def _wants_message(self, data: bytes | bytearray) -> bool:
+        # Only event notifications are skipped; everything else may be a
+        # reply someone is waiting for
+        event_type = p.peek_event_type(data)
+        if event_type is None:
+            return True
+        return _EVENT_MESSAGE_TYPES.get(event_type, UnknownProtocolMessage) in self._handlers
+
     def _on_recv(self, msg: p.Message) -> None:
         radio_message = radio_message_from_protocol(msg)
-        for handler in self._handlers:
-            handler(radio_message)
+
+        if msg.is_reply:
+            self._dispatch_reply(
+                (msg.command_group, msg.command), radio_message, _reply_item_id(msg.body)
+            )
+
+        handlers = self._handlers.get(type(radio_message))
+
+        if handlers:
+            # Copied, as handlers may remove themselves while being called
+            for handler in tuple(handlers.values()):
+                handler(radio_message)
 
     # Command API
 
@@ -208,6 +415,12 @@ class CommandConnection:
             raise reply.as_exception()
         return reply.channel
 
+    async def get_channels(self, channel_ids: t.Sequence[int]) -> t.List[Channel]:
+        """Get several channels, pipelining the requests"""
+        return list(await asyncio.gather(
+            *(self.get_channel(channel_id) for channel_id in channel_ids)
+        ))
+
     async def set_channel(self, channel: Channel):
         """Set a channel"""
         reply = await self.send_message_expect_reply(SetChannel(channel), SetChannelReply)
@@ -689,6 +902,25 @@ ReplyStatus = t.Literal[
 ]
 
 
+class ReplyTimeoutError(asyncio.TimeoutError):
+    """Raised when the radio doesn't reply to a command in time"""
+
+    def __init__(self, command: CommandMessage, timeout: float | None):
+        super().__init__(
+            f"No reply to {type(command).__name__} within {timeout} seconds"
+        )
+        self.command = command
+
+
+@dataclass
+class ReplyMetrics:
+    """Counters for requests that didn't get their reply"""
+    timeouts: int = 0
+    cancellations: int = 0
+    orphaned_replies: int = 0
+    """Replies that arrived with no request waiting for them (e.g. late replies)"""
+
+
 class MessageReplyError(t.NamedTuple):
     message_type: t.Type[t.Any]
     reason: ReplyStatus
@@ -747,6 +979,17 @@ EventMessage = t.Union[
     UnknownProtocolMessage,
 ]
 
+EVENT_MESSAGE_TYPES: t.Tuple[t.Type[EventMessage], ...] = t.get_args(EventMessage)
+"""@private"""
+
+_EVENT_MESSAGE_TYPES: t.Dict[int, t.Type[EventMessage]] = {
+    p.EventType.HT_STATUS_CHANGED: StatusChangedEvent,
+    p.EventType.DATA_RXD: TncDataFragmentReceivedEvent,
+    p.EventType.HT_CH_CHANGED: ChannelChangedEvent,
+    p.EventType.HT_SETTINGS_CHANGED: SettingsChangedEvent,
+}
+# Other event types are decoded as UnknownProtocolMessage
+
 EventType = t.Literal[
     "HT_STATUS_CHANGED",
     "DATA_RXD",
@@ -776,6 +1019,148 @@ RadioMessageHandler = t.Callable[[RadioMessage], None]
 EventHandler = t.Callable[[EventMessage], None]
 """@private"""
 
+LATE_REPLY_GRACE = 0.5
+"""@private (How long a reply that may be a late reply waits for another reply to follow it)"""
+
+ReplyKey = t.Tuple[p.CommandGroup, p.BasicCommand | p.ExtendedCommand]
+"""@private"""
+
+
+@dataclass(eq=False)
+class PendingReply:
+    """@private"""
+    expect: t.Type[t.Any]
+    future: asyncio.Future[RadioMessage]
+    item_id: int | None = None
+    sent: bool = False
+    abandoned: bool = False  # Timed out or cancelled, but its reply may still arrive
+    held: RadioMessage | None = None  # A reply that is either its own, or a late reply
+    held_handle: asyncio.TimerHandle | None = None
+
+    def release_held(self) -> None:
+        if self.held_handle is not None:
+            self.held_handle.cancel()
+        self.held = None
+        self.held_handle = None
+
+    def accepts(self, reply: RadioMessage, item_id: int | None) -> bool:
+        if not isinstance(reply, (self.expect, MessageReplyError)):
+            return False
+        # Replies that say which item (e.g. channel) they are for only
+        # match requests for that item
+        return item_id is None or self.item_id is None or item_id == self.item_id
+
+
+def _request_item_id(command: CommandMessage) -> int | None:
+    match command:
+        case GetChannel(channel_id=channel_id):
+            return channel_id
+        case SetChannel(channel=channel):
+            return channel.channel_id
+        case _:
+            return None
+
+
+def _reply_item_id(body: p.MessageBody | bytes) -> int | None:
+    match body:
+        case p.ReadRFChReplyBody(rf_ch=rf_ch) if rf_ch is not None:
+            return rf_ch.channel_id
+        case p.WriteRFChReplyBody(reply_status=p.ReplyStatus.SUCCESS, channel_id=channel_id):
+            return channel_id
+        case _:
+            return None
+
+
+EventOverflowPolicy = t.Literal["drop_oldest", "drop_newest"]
+
+
+class EventStream:
+    """An async iterator over received events, buffered in a bounded queue
+
+    When the queue is full, new events either push out the oldest queued
+    event ("drop_oldest") or are discarded ("drop_newest"). Iteration ends
+    once the stream is closed (or its connection is disconnected) and the
+    queued events have been consumed.
+    """
+    _queue: t.Deque[EventMessage]
+    _maxsize: int
+    _overflow: EventOverflowPolicy
+    _closed: bool
+    _waiters: t.List[asyncio.Future[None]]
+    _on_close: t.Callable[[], None]
+    dropped: int
+    """The number of events dropped because the queue was full"""
+
+    def __init__(
+        self,
+        maxsize: int,
+        overflow: EventOverflowPolicy,
+        on_close: t.Callable[[], None],
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self._queue = deque()
+        self._maxsize = maxsize
+        self._overflow = overflow
+        self._closed = False
+        self._waiters = []
+        self._on_close = on_close
+        self.dropped = 0
+
+    def _put(self, event: EventMessage) -> None:
+        if self._closed:
+            return
+
+        if len(self._queue) >= self._maxsize:
+            self.dropped += 1
+            if self._overflow == "drop_newest":
+                return
+            self._queue.popleft()
+
+        self._queue.append(event)
+        self._wake()
+
+    def _wake(self) -> None:
+        # Every waiting consumer rechecks the queue
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._on_close()
+        self._wake()
+
+    def __aiter__(self) -> EventStream:
+        return self
+
+    async def __anext__(self) -> EventMessage:
+        while not self._queue:
+            if self._closed:
+                raise StopAsyncIteration
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        return self._queue.popleft()
+
+    async def __aenter__(self) -> EventStream:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: t.Any,
+        exc_value: t.Any,
+        traceback: t.Any,
+    ) -> None:
+        self.close()
+
 #####################
 # Protocol to data object conversions
 
@@ -61,6 +61,10 @@ async def main():
 asyncio.run(main())
 ```
 
+`radio.channels` is a read-only `ChannelsView` rather than a `list`: it
+supports indexing, slicing and iteration, but not list methods or equality
+with a list. Use `list(radio.channels)` when you need a list.
+
 ## Handling Events
 
 The `RadioController` class provides a `add_event_handler` method for
@@ -90,6 +94,19 @@ async def main():
 asyncio.run(main())
 ```
 
+Handlers are called as soon as an event is received, so they should
+return quickly. Alternatively, `events` returns an async iterator that
+buffers events in a bounded queue:
+
+```python
+async for event in radio.events([ChannelChangedEvent], maxsize=16):
+    print(f"Channel changed: {event.channel}")
+```
+
+Both `add_event_handler` and `events` take an optional list of event message types
+(e.g. `[ChannelChangedEvent]`) to limit them to. Events that
+no handler is registered for are skipped without being decoded.
+
 # Interactive Usage
 
 Python's async REPL is a great tool for interactively exploring the radio's
@@ -148,7 +165,11 @@ execution to the event loop by running something like `await asyncio.sleep(0)`.)
 from __future__ import annotations
 from typing_extensions import Unpack
 from dataclasses import dataclass
+from pathlib import Path
+from pydantic import TypeAdapter, ValidationError
 import typing as t
+import asyncio
+import os
 import sys
 
 from .command import (
@@ -163,6 +184,8 @@ from .command import (
     BeaconSettingsArgs,
     TncDataFragment,
     EventMessage,
+    EventOverflowPolicy,
+    EventStream,
     EventType,
     SettingsChangedEvent,
     TncDataFragmentReceivedEvent,
@@ -175,29 +198,264 @@ from .command import (
 
 
 @dataclass
-class _RadioState:
+class RadioState:
+    """A snapshot of the radio's state, as stored by a `RadioStateCache`"""
     device_info: DeviceInfo
     beacon_settings: BeaconSettings
     status: Status
     settings: Settings
-    channels: t.List[Channel]
+    channels: t.List[Channel | None]  # None for channels that aren't loaded yet
+
+
+class RadioStateCacheKey(t.NamedTuple):
+    """Identifies a radio, and the firmware its cached state was read with"""
+    device_uuid: str
+    vendor_id: int
+    product_id: int
+    hardware_version: int
+    firmware_version: int
+
+    @classmethod
+    def from_device_info(cls, device_uuid: str, device_info: DeviceInfo) -> RadioStateCacheKey:
+        return cls(
+            device_uuid=device_uuid,
+            vendor_id=device_info.vendor_id,
+            product_id=device_info.product_id,
+            hardware_version=device_info.hardware_version,
+            firmware_version=device_info.firmware_version,
+        )
+
+
+class RadioStateCache(t.Protocol):
+    """Persists the last `RadioState` read from each radio between sessions"""
+    def load(self, key: RadioStateCacheKey) -> RadioState | None:
+        ...
+
+    def store(self, key: RadioStateCacheKey, state: RadioState) -> None:
+        ...
+
+
+@dataclass
+class _CachedRadioState:
+    key: RadioStateCacheKey
+    state: RadioState
+
+
+_cached_radio_state_adapter = TypeAdapter(_CachedRadioState)
+
+
+class FileRadioStateCache:
+    """Stores the last radio state read from each device as a JSON file in `directory`"""
+    _directory: Path
+
+    def __init__(self, directory: str | os.PathLike[str]):
+        self._directory = Path(directory)
+
+    def _path(self, key: RadioStateCacheKey) -> Path:
+        name = "".join(c if c.isalnum() else "_" for c in key.device_uuid)
+        return self._directory / f"{name}.json"
+
+    def load(self, key: RadioStateCacheKey) -> RadioState | None:
+        try:
+            cached = _cached_radio_state_adapter.validate_json(
+                self._path(key).read_bytes()
+            )
+        except (OSError, ValidationError):
+            return None
+
+        if cached.key != key:
+            return None
+
+        return cached.state
+
+    def store(self, key: RadioStateCacheKey, state: RadioState) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(
+            _cached_radio_state_adapter.dump_json(_CachedRadioState(key, state))
+        )
+        os.replace(tmp_path, path)
+
+
+class ChannelWriteResult(t.NamedTuple):
+    """The outcome of writing one channel with `RadioController.set_channels`"""
+    channel_id: int
+    changed: bool
+    """Whether the channel was written (False if it was already up to date, or the write failed)"""
+    error: Exception | None = None
+
+
+StateEntry = t.Union[t.Literal["settings", "beacon_settings", "status"], int]
+"""@private (A part of the radio state: a channel id, or the name of another entry)"""
+
+HydrateProgressCallback = t.Callable[[int, int], None]
+"""Called with (steps done, total steps) while the radio state is loaded"""
+
+_T = t.TypeVar("_T")
+_M = t.TypeVar("_M", Settings, BeaconSettings)
+
+
+async def _gather_or_cancel(*aws: t.Awaitable[t.Any]) -> t.List[t.Any]:
+    # Like asyncio.gather, but when one awaitable fails the others are
+    # cancelled and awaited instead of being left running in the background
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class _CoalescedWrite(t.Generic[_M]):
+    """Merges updates made within `delay` seconds of each other into one write
+
+    All callers that contributed to a write share its result.
+    """
+    _delay: float
+    _current: t.Callable[[], _M]
+    _write: t.Callable[[_M], t.Awaitable[None]]
+    _pending: t.Dict[str, t.Any]
+    _future: asyncio.Future[_M] | None
+    _tasks: t.Set[asyncio.Task[None]]
+    _lock: asyncio.Lock
+
+    def __init__(
+        self,
+        delay: float,
+        current: t.Callable[[], _M],
+        write: t.Callable[[_M], t.Awaitable[None]],
+    ):
+        self._delay = delay
+        self._current = current
+        self._write = write
+        self._pending = {}
+        self._future = None
+        self._tasks = set()
+        self._lock = asyncio.Lock()
+
+    async def update(self, args: t.Mapping[str, t.Any]) -> _M:
+        self._pending.update(args)
+
+        if self._future is None:
+            self._future = asyncio.get_running_loop().create_future()
+            task = asyncio.create_task(self._flush())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        # A cancelled caller must not cancel the write for everyone else
+        return await asyncio.shield(self._future)
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self._delay)
+
+        # One write at a time: the next batch keeps collecting updates until
+        # the write before it is done, and is then built on top of its result
+        async with self._lock:
+            future, args = self._future, self._pending
+            self._future, self._pending = None, {}
+            assert future is not None
+
+            try:
+                # Updates are applied on top of the latest known state, so
+                # changes reported by the radio during the window are kept
+                new_value = self._current().model_copy(update=args)
+                await self._write(new_value)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(new_value)
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._future is not None:
+            self._future.cancel()
+        self._pending, self._future = {}, None
 
 
 class RadioController:
     _conn: CommandConnection
-    _state: _RadioState | None
-
-    def __init__(self, connection: CommandConnection):
+    _state: RadioState | None
+    _state_cache: RadioStateCache | None
+    _device_uuid: str | None
+    _revalidate_task: asyncio.Task[None] | None
+    _lazy_channels: bool
+    _channel_fetches: t.Dict[int, asyncio.Task[Channel]]
+    _revision: int
+    _modified_at: t.Dict[StateEntry, int]
+    _settings_writes: _CoalescedWrite[Settings] | None
+    _beacon_settings_writes: _CoalescedWrite[BeaconSettings] | None
+
+    def __init__(
+        self,
+        connection: CommandConnection,
+        state_cache: RadioStateCache | None = None,
+        device_uuid: str | None = None,
+        lazy_channels: bool = False,
+        write_debounce: float | None = None,
+    ):
+        if state_cache is not None and device_uuid is None:
+            raise ValueError("device_uuid is required when using a state cache")
         self._conn = connection
         self._state = None
+        self._state_cache = state_cache
+        self._device_uuid = device_uuid
+        self._revalidate_task = None
+        self._lazy_channels = lazy_channels
+        self._channel_fetches = {}
+        self._revision = 0
+        self._modified_at = {}
+
+        # With write_debounce, settings updates made in quick succession
+        # are merged and sent to the radio as a single write
+        if write_debounce is None:
+            self._settings_writes = None
+            self._beacon_settings_writes = None
+        else:
+            self._settings_writes = _CoalescedWrite(
+                write_debounce, lambda: self.settings, self._write_settings
+            )
+            self._beacon_settings_writes = _CoalescedWrite(
+                write_debounce, lambda: self.beacon_settings, self._write_beacon_settings
+            )
 
     @classmethod
-    def new_ble(cls, device_uuid: str) -> RadioController:
-        return RadioController(CommandConnection.new_ble(device_uuid))
+    def new_ble(
+        cls,
+        device_uuid: str,
+        state_cache: RadioStateCache | None = None,
+        lazy_channels: bool = False,
+        write_debounce: float | None = None,
+    ) -> RadioController:
+        return RadioController(
+            CommandConnection.new_ble(device_uuid),
+            state_cache=state_cache,
+            device_uuid=device_uuid,
+            lazy_channels=lazy_channels,
+            write_debounce=write_debounce,
+        )
 
     @classmethod
-    def new_rfcomm(cls, device_uuid: str, channel: int | t.Literal["auto"] = "auto") -> RadioController:
-        return RadioController(CommandConnection.new_rfcomm(device_uuid, channel))
+    def new_rfcomm(
+        cls,
+        device_uuid: str,
+        channel: int | t.Literal["auto"] = "auto",
+        state_cache: RadioStateCache | None = None,
+        lazy_channels: bool = False,
+        write_debounce: float | None = None,
+        checksum: bool = False,
+    ) -> RadioController:
+        return RadioController(
+            CommandConnection.new_rfcomm(device_uuid, channel, checksum=checksum),
+            state_cache=state_cache,
+            device_uuid=device_uuid,
+            lazy_channels=lazy_channels,
+            write_debounce=write_debounce,
+        )
 
     def __repr__(self):
         if not self.is_connected():
@@ -210,17 +468,27 @@ class RadioController:
             raise StateNotInitializedError()
         return self._state.beacon_settings
 
-    async def set_beacon_settings(self, **packet_settings_args: Unpack[BeaconSettingsArgs]):
+    async def set_beacon_settings(self, **packet_settings_args: Unpack[BeaconSettingsArgs]) -> BeaconSettings:
         if self._state is None:
             raise StateNotInitializedError()
 
+        if self._beacon_settings_writes is not None:
+            return await self._beacon_settings_writes.update(packet_settings_args)
+
         new_beacon_settings = self._state.beacon_settings.model_copy(
             update=dict(packet_settings_args)
         )
 
-        await self._conn.set_beacon_settings(new_beacon_settings)
+        await self._write_beacon_settings(new_beacon_settings)
+
+        return new_beacon_settings
+
+    async def _write_beacon_settings(self, beacon_settings: BeaconSettings) -> None:
+        await self._conn.set_beacon_settings(beacon_settings)
 
-        self._state.beacon_settings = new_beacon_settings
+        if self._state is not None:
+            self._state.beacon_settings = beacon_settings
+            self._mark_modified("beacon_settings")
 
     @property
     def status(self) -> Status:
@@ -234,17 +502,27 @@ class RadioController:
             raise StateNotInitializedError()
         return self._state.settings
 
-    async def set_settings(self, **settings_args: Unpack[SettingsArgs]):
+    async def set_settings(self, **settings_args: Unpack[SettingsArgs]) -> Settings:
         if self._state is None:
             raise StateNotInitializedError()
 
+        if self._settings_writes is not None:
+            return await self._settings_writes.update(settings_args)
+
         new_settings = self._state.settings.model_copy(
             update=dict(settings_args)
         )
 
-        await self._conn.set_settings(new_settings)
+        await self._write_settings(new_settings)
+
+        return new_settings
 
-        self._state.settings = new_settings
+    async def _write_settings(self, settings: Settings) -> None:
+        await self._conn.set_settings(settings)
+
+        if self._state is not None:
+            self._state.settings = settings
+            self._mark_modified("settings")
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -253,10 +531,70 @@ class RadioController:
         return self._state.device_info
 
     @property
-    def channels(self) -> t.List[Channel]:
+    def channels(self) -> ChannelsView:
+        if self._state is None:
+            raise StateNotInitializedError()
+        return ChannelsView(self)
+
+    async def get_channel(self, channel_id: int) -> Channel:
+        """Get a channel, fetching it from the radio if it isn't loaded yet"""
+        if self._state is None:
+            raise StateNotInitializedError()
+
+        channel = self._state.channels[channel_id]
+
+        if channel is not None:
+            return channel
+
+        return await self._fetch_channel(channel_id)
+
+    async def prefetch_channels(self, channel_ids: t.Iterable[int] | None = None) -> None:
+        """Load the given channels (default: all channels) that aren't loaded yet"""
         if self._state is None:
             raise StateNotInitializedError()
-        return self._state.channels
+
+        channels = self._state.channels
+
+        missing = [
+            i for i in (range(len(channels)) if channel_ids is None else channel_ids)
+            if channels[i] is None
+        ]
+
+        # Fetches are shared with other callers, so they aren't cancelled if
+        # one fails; the connection limits how many are in flight
+        await asyncio.gather(*(self._fetch_channel(i) for i in missing))
+
+    def _fetch_channel(self, channel_id: int) -> asyncio.Task[Channel]:
+        # Concurrent fetches of the same channel share one request
+        task = self._channel_fetches.get(channel_id)
+
+        if task is None:
+            task = asyncio.create_task(self._load_channel(channel_id))
+            self._channel_fetches[channel_id] = task
+            task.add_done_callback(
+                lambda task: self._on_channel_fetched(channel_id, task)
+            )
+
+        return task
+
+    async def _load_channel(self, channel_id: int) -> Channel:
+        channel = await self._conn.get_channel(channel_id)
+
+        if self._state is not None:
+            self._state.channels[channel_id] = channel
+            self._mark_modified(channel_id)
+
+        return channel
+
+    def _on_channel_fetched(self, channel_id: int, task: asyncio.Task[Channel]) -> None:
+        if self._channel_fetches.get(channel_id) is task:
+            del self._channel_fetches[channel_id]
+
+        if not task.cancelled() and task.exception() is not None:
+            print(
+                f"Warning: Failed to load channel {channel_id}: {task.exception()!r}",
+                file=sys.stderr
+            )
 
     async def set_channel(
         self, channel_id: int, **channel_args: Unpack[ChannelArgs]
@@ -264,13 +602,49 @@ class RadioController:
         if self._state is None:
             raise StateNotInitializedError()
 
-        new_channel = self._state.channels[channel_id].model_copy(
+        channel = await self.get_channel(channel_id)
+
+        new_channel = channel.model_copy(
             update=dict(channel_args)
         )
 
         await self._conn.set_channel(new_channel)
 
         self._state.channels[channel_id] = new_channel
+        self._mark_modified(channel_id)
+
+    async def set_channels(
+        self, updates: t.Mapping[int, ChannelArgs]
+    ) -> t.List[ChannelWriteResult]:
+        """Update many channels, skipping unchanged ones and pipelining the writes"""
+        if self._state is None:
+            raise StateNotInitializedError()
+
+        async def apply(channel_id: int, channel_args: ChannelArgs) -> ChannelWriteResult:
+            try:
+                channel = await self.get_channel(channel_id)
+
+                new_channel = channel.model_copy(
+                    update=dict(channel_args)
+                )
+
+                if new_channel == channel:
+                    return ChannelWriteResult(channel_id, changed=False)
+
+                await self._conn.set_channel(new_channel)
+            except Exception as e:
+                return ChannelWriteResult(channel_id, changed=False, error=e)
+
+            if self._state is not None:
+                self._state.channels[channel_id] = new_channel
+                self._mark_modified(channel_id)
+
+            return ChannelWriteResult(channel_id, changed=True)
+
+        return list(await asyncio.gather(*(
+            apply(channel_id, channel_args)
+            for channel_id, channel_args in updates.items()
+        )))
 
     def is_connected(self) -> bool:
         return self._state is not None and self._conn.is_connected()
@@ -304,26 +678,65 @@ class RadioController:
             data=data
         ))
 
-    def add_event_handler(self, handler: EventHandler) -> t.Callable[[], None]:
-        return self._conn.add_event_handler(handler)
+    def add_event_handler(
+        self,
+        handler: EventHandler,
+        event_types: t.Iterable[t.Type[EventMessage]] | None = None,
+    ) -> t.Callable[[], None]:
+        return self._conn.add_event_handler(handler, event_types)
+
+    def events(
+        self,
+        types: t.Iterable[t.Type[EventMessage]] | None = None,
+        maxsize: int = 64,
+        overflow: EventOverflowPolicy = "drop_oldest",
+    ) -> EventStream:
+        """Stream events through a bounded queue, e.g. `async for event in radio.events(): ...`"""
+        return self._conn.events(types, maxsize, overflow)
 
     async def enable_event(self, event_type: EventType):
         await self._conn.enable_event(event_type)
 
-    async def _hydrate(self) -> None:
+    def _cache_key(self, device_info: DeviceInfo) -> RadioStateCacheKey | None:
+        if self._state_cache is None or self._device_uuid is None:
+            return None
+        return RadioStateCacheKey.from_device_info(self._device_uuid, device_info)
+
+    async def _hydrate(self, on_progress: HydrateProgressCallback | None = None) -> None:
         device_info = await self._conn.get_device_info()
 
-        channels: t.List[Channel] = []
+        cache_key = self._cache_key(device_info)
+        cached_state = (
+            self._state_cache.load(cache_key)
+            if self._state_cache is not None and cache_key is not None else None
+        )
+
+        if cached_state is not None:
+            # Serve the cached state right away, and refresh it with a fresh
+            # read from the radio in the background
+            cached_state.device_info = device_info
 
-        for i in range(device_info.channel_count):
-            channel_settings = await self._conn.get_channel(i)
-            channels.append(channel_settings)
+            # The channel count may have changed since the state was cached
+            n_channels = device_info.channel_count
+            channels = (cached_state.channels + [None] * n_channels)[:n_channels]
+            cached_state.channels = channels
 
-        settings = await self._conn.get_settings()
+            # Only the channels that were loaded before are re-read
+            revalidate_ids = [i for i, channel in enumerate(channels) if channel is not None]
 
-        beacon_settings = await self._conn.get_beacon_settings()
+            # The state may have been cached by a session with lazy_channels
+            if not self._lazy_channels:
+                await self._read_channels(
+                    [i for i, channel in enumerate(channels) if channel is None], channels
+                )
 
-        status = await self._conn.get_status()
+            state = cached_state
+        else:
+            channel_ids = (
+                [] if self._lazy_channels else range(device_info.channel_count)
+            )
+            state = await self._read_state(device_info, channel_ids, on_progress)
+            self._store_state(state)
 
         # For some reason, enabling the HT_STATUS_CHANGED event
         # also enables the DATA_RXD event, and maybe others...
@@ -334,7 +747,63 @@ class RadioController:
         # users enable events manually, while simultaneously registering handlers
         # of the proper type?
 
-        self._state = _RadioState(
+        self._state = state
+
+        if cached_state is not None:
+            self._revalidate_task = asyncio.create_task(
+                self._revalidate(device_info, revalidate_ids)
+            )
+
+        # No need to save the remove event handler function, since we don't
+        # need to unregister it when we disconnect (the connection will take care of that)
+        self._conn.add_event_handler(
+            self._on_event_message,
+            # TNC data is left to user handlers, so it isn't decoded unless
+            # one of them asks for it
+            [
+                ChannelChangedEvent,
+                SettingsChangedEvent,
+                StatusChangedEvent,
+                UnknownProtocolMessage,
+            ],
+        )
+
+    async def _read_state(
+        self,
+        device_info: DeviceInfo,
+        channel_ids: t.Sequence[int],
+        on_progress: HydrateProgressCallback | None = None,
+    ) -> RadioState:
+        n_total = len(channel_ids) + 4
+        n_done = 0
+
+        def advance():
+            nonlocal n_done
+            n_done += 1
+            if on_progress is not None:
+                on_progress(n_done, n_total)
+
+        async def step(aw: t.Awaitable[_T]) -> _T:
+            out = await aw
+            advance()
+            return out
+
+        advance()  # device info
+
+        async def get_channels() -> t.List[Channel | None]:
+            channels: t.List[Channel | None] = [None] * device_info.channel_count
+            await self._read_channels(channel_ids, channels, step)
+            return channels
+
+        # Channels are read alongside the settings, beacon settings and status
+        channels, settings, beacon_settings, status = await _gather_or_cancel(
+            get_channels(),
+            step(self._conn.get_settings()),
+            step(self._conn.get_beacon_settings()),
+            step(self._conn.get_status()),
+        )
+
+        return RadioState(
             device_info=device_info,
             beacon_settings=beacon_settings,
             status=status,
@@ -342,11 +811,64 @@ class RadioController:
             channels=channels,
         )
 
-        # No need to save the remove event handler function, since we don't
-        # need to unregister it when we disconnect (the connection will take care of that)
-        self._conn.add_event_handler(
-            self._on_event_message
-        )
+    async def _read_channels(
+        self,
+        channel_ids: t.Sequence[int],
+        channels: t.List[Channel | None],
+        step: t.Callable[[t.Awaitable[Channel]], t.Awaitable[Channel]] | None = None,
+    ) -> None:
+        # All requests are queued at once: the connection's window keeps a
+        # bounded number in flight, sending the next as soon as a reply arrives
+        async def read_channel(i: int) -> None:
+            aw = self._conn.get_channel(i)
+            channels[i] = await (aw if step is None else step(aw))
+
+        await _gather_or_cancel(*(read_channel(i) for i in channel_ids))
+
+    async def _revalidate(self, device_info: DeviceInfo, channel_ids: t.Sequence[int]) -> None:
+        started_at = self._revision
+
+        try:
+            fresh = await self._read_state(device_info, channel_ids)
+        except Exception as e:
+            print(f"Warning: Failed to refresh cached radio state: {e!r}", file=sys.stderr)
+            return
+
+        state = self._state
+
+        if state is None:
+            return
+
+        # Entries written or changed by an event while the radio was re-read
+        # are at least as new as the fresh read, so they are kept
+        def unmodified(entry: StateEntry) -> bool:
+            return self._modified_at.get(entry, 0) <= started_at
+
+        if unmodified("settings"):
+            state.settings = fresh.settings
+        if unmodified("beacon_settings"):
+            state.beacon_settings = fresh.beacon_settings
+        if unmodified("status"):
+            state.status = fresh.status
+
+        for i in channel_ids:
+            if unmodified(i):
+                state.channels[i] = fresh.channels[i]
+
+        self._store_state(state)
+
+    def _mark_modified(self, entry: StateEntry) -> None:
+        self._revision += 1
+        self._modified_at[entry] = self._revision
+
+    def _store_state(self, state: RadioState) -> None:
+        cache_key = self._cache_key(state.device_info)
+        if self._state_cache is None or cache_key is None:
+            return
+        try:
+            self._state_cache.store(cache_key, state)
+        except OSError as e:
+            print(f"Warning: Failed to cache radio state: {e!r}", file=sys.stderr)
 
     def _on_event_message(self, event_message: EventMessage) -> None:
         if self._state is None:
@@ -357,12 +879,15 @@ class RadioController:
         match event_message:
             case ChannelChangedEvent(channel):
                 self._state.channels[channel.channel_id] = channel
+                self._mark_modified(channel.channel_id)
             case SettingsChangedEvent(settings):
                 self._state.settings = settings
+                self._mark_modified("settings")
             case TncDataFragmentReceivedEvent():
                 pass
             case StatusChangedEvent(status):
                 self._state.status = status
+                self._mark_modified("status")
             case UnknownProtocolMessage(message):
                 print(
                     f"[DEBUG] Unknown protocol message: {message}",
@@ -382,21 +907,124 @@ class RadioController:
     ) -> None:
         await self.disconnect()
 
-    async def connect(self) -> None:
+    async def connect(self, on_progress: HydrateProgressCallback | None = None) -> None:
         if self._state is not None:
             raise RuntimeError("Already connected")
 
         await self._conn.connect()
-        await self._hydrate()
+        await self._hydrate(on_progress)
 
     async def disconnect(self) -> None:
         if self._state is None:
             raise StateNotInitializedError()
 
+        if self._revalidate_task is not None:
+            self._revalidate_task.cancel()
+            self._revalidate_task = None
+
+        for task in self._channel_fetches.values():
+            task.cancel()
+
+        for writes in (self._settings_writes, self._beacon_settings_writes):
+            if writes is not None:
+                writes.cancel()
+
         await self._conn.disconnect()
         self._state = None
 
 
+class ChannelsView(t.Sequence[Channel]):
+    """A read-only view of the radio's channels
+
+    This is a `Sequence`, not a `list`: it supports `len`, indexing, slicing
+    and iteration, but has no list methods (`append`, `sort`, ...) and never
+    compares equal to a list. Use `list(radio.channels)` to get a copy as a list.
+
+    With `lazy_channels`, channels are loaded on demand. Indexing a channel that
+    isn't loaded yet starts fetching it in the background and raises
+    `ChannelNotLoadedError`; use `RadioController.get_channel` or
+    `RadioController.prefetch_channels` to wait for channels instead.
+    Iterating (including `in`, `index` and `list(...)`) raises
+    `ChannelNotLoadedError` without fetching anything unless every channel
+    is loaded; use `loaded` to iterate over the channels loaded so far.
+    """
+    _controller: RadioController
+
+    def __init__(self, controller: RadioController):
+        self._controller = controller
+
+    def _channels(self) -> t.List[Channel | None]:
+        state = self._controller._state
+        if state is None:
+            raise StateNotInitializedError()
+        return state.channels
+
+    def __len__(self) -> int:
+        return len(self._channels())
+
+    @t.overload
+    def __getitem__(self, index: int) -> Channel: ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> t.List[Channel]: ...
+
+    def __getitem__(self, index: int | slice) -> Channel | t.List[Channel]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        channel = self._channels()[index]
+
+        if channel is None:
+            channel_id = range(len(self))[index]
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                self._controller._fetch_channel(channel_id)
+            raise ChannelNotLoadedError(channel_id)
+
+        return channel
+
+    def _all_loaded(self) -> t.List[Channel]:
+        channels = self._channels()
+        for channel_id, channel in enumerate(channels):
+            if channel is None:
+                raise ChannelNotLoadedError(
+                    channel_id,
+                    "Await prefetch_channels() before iterating over all channels, "
+                    "or use channels.loaded()."
+                )
+        return t.cast(t.List[Channel], list(channels))
+
+    def __iter__(self) -> t.Iterator[Channel]:
+        return iter(self._all_loaded())
+
+    def __reversed__(self) -> t.Iterator[Channel]:
+        return reversed(self._all_loaded())
+
+    def index(self, value: t.Any, start: int = 0, stop: int | None = None) -> int:
+        channels = self._all_loaded()
+        return channels.index(value, start, len(channels) if stop is None else stop)
+
+    def loaded(self) -> t.List[Channel]:
+        """The channels that are loaded so far"""
+        return [channel for channel in self._channels() if channel is not None]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._channels()!r})"
+
+
+class ChannelNotLoadedError(RuntimeError):
+    """Raised when accessing a channel that hasn't been loaded from the radio yet."""
+
+    def __init__(self, channel_id: int, hint: str | None = None):
+        if hint is None:
+            hint = f"Try awaiting get_channel({channel_id}) first."
+        super().__init__(f"Channel {channel_id} is not loaded yet. {hint}")
+        self.channel_id = channel_id
+
+
 class StateNotInitializedError(RuntimeError):
     """Raised when trying to access radio state before it has been initialized."""
 
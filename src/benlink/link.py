@@ -5,7 +5,6 @@ import asyncio
 from bleak import BleakClient
 from bleak.backends.characteristic import BleakGATTCharacteristic
 from . import protocol as p
-from .protocol.command.bitfield import BitStream
 
 ##################################################
 # CommandLink
@@ -21,13 +20,21 @@ class CommandLink(t.Protocol):
     async def send(self, msg: p.Message) -> None:
         ...
 
-    async def connect(self, callback: t.Callable[[p.Message], None]) -> None:
+    async def connect(
+        self,
+        callback: t.Callable[[p.Message], None],
+        message_filter: MessageFilter | None = None,
+    ) -> None:
         ...
 
     async def disconnect(self) -> None:
         ...
 
 
+MessageFilter = t.Callable[[bytes | bytearray], bool]
+"""Called with each encoded message before it is decoded; messages it returns False for are dropped"""
+
+
 RADIO_SERVICE_UUID = "00001100-d102-11e1-9b23-00025b00a5a5"
 """@private"""
 
@@ -53,12 +60,17 @@ class BleCommandLink:
     async def send_bytes(self, data: bytes):
         await self._client.write_gatt_char(RADIO_WRITE_UUID, data, response=True)
 
-    async def connect(self, callback: t.Callable[[p.Message], None]):
+    async def connect(
+        self,
+        callback: t.Callable[[p.Message], None],
+        message_filter: MessageFilter | None = None,
+    ):
         await self._client.connect()
 
         def on_data(characteristic: BleakGATTCharacteristic, data: bytearray) -> None:
             assert characteristic.uuid == RADIO_INDICATE_UUID
-            callback(p.Message.from_bytes(data))
+            if message_filter is None or message_filter(data):
+                callback(p.Message.from_bytes(data))
 
         await self._client.start_notify(RADIO_INDICATE_UUID, on_data)
 
@@ -69,7 +81,8 @@ class BleCommandLink:
 
 class RfcommCommandLink:
     _client: RfcommClient
-    _buffer: BitStream
+    _deframer: p.GaiaDeframer
+    _checksum: bool
 
     def is_connected(self) -> bool:
         return self._client.is_connected()
@@ -78,23 +91,36 @@ class RfcommCommandLink:
         self,
         device_uuid: str,
         channel: int | t.Literal["auto"] = "auto",
-        read_size: int = 1024
+        read_size: int = 1024,
+        checksum: bool = False,
     ):
         if channel == "auto":
             raise NotImplementedError(
                 "Auto channel selection not implemented yet"
             )
         self._client = RfcommClient(device_uuid, channel, read_size)
-        self._buffer = BitStream()
+        self._deframer = p.GaiaDeframer()
+        self._checksum = checksum
 
     async def send(self, msg: p.Message):
         msg_bytes = msg.to_bytes()
 
+        # Don't count the command_group and command_id bytes
+        n_bytes_payload = len(msg_bytes) - 4
+
+        if self._checksum:
+            flags = p.GaiaFlags.CHECKSUM
+            header = p.GAIA_SYNC + bytes([flags, n_bytes_payload])
+            checksum = p.gaia_checksum(header + msg_bytes)
+        else:
+            flags = p.GaiaFlags.NONE
+            checksum = None
+
         gaia_frame = p.GaiaFrame(
-            flags=p.GaiaFlags.NONE,
-            # Don't count the command_group and command_id bytes
-            n_bytes_payload=len(msg_bytes) - 4,
+            flags=flags,
+            n_bytes_payload=n_bytes_payload,
             data=msg_bytes,
+            checksum=checksum,
         )
 
         await self.send_bytes(gaia_frame.to_bytes())
@@ -102,16 +128,15 @@ class RfcommCommandLink:
     async def send_bytes(self, data: bytes):
         await self._client.write(data)
 
-    async def connect(self, callback: t.Callable[[p.Message], None]):
+    async def connect(
+        self,
+        callback: t.Callable[[p.Message], None],
+        message_filter: MessageFilter | None = None,
+    ):
         def on_data(data: bytes):
-            self._buffer = self._buffer.extend_bytes(data)
-
-            gaia_frames, self._buffer = p.GaiaFrame.from_bitstream_batch(
-                self._buffer
-            )
-
-            for gaia_frame in gaia_frames:
-                callback(p.Message.from_bytes(gaia_frame.data))
+            for frame_data in self._deframer.feed(data):
+                if message_filter is None or message_filter(frame_data):
+                    callback(p.Message.from_bytes(frame_data))
 
         await self._client.connect(on_data)
 
@@ -129,16 +154,22 @@ class AudioLink(t.Protocol):
     async def send(self, msg: p.AudioMessage) -> None:
         ...
 
+    async def send_many(self, msgs: t.Sequence[p.AudioMessage]) -> None:
+        ...
+
     async def connect(self, callback: t.Callable[[p.AudioMessage], None]) -> None:
         ...
 
+    async def connect_batch(self, callback: t.Callable[[t.List[p.AudioMessage]], None]) -> None:
+        ...
+
     async def disconnect(self) -> None:
         ...
 
 
 class RfcommAudioLink:
     _client: RfcommClient
-    _buffer: bytes
+    _deframer: p.AudioDeframer
 
     def is_connected(self) -> bool:
         return self._client.is_connected()
@@ -154,28 +185,34 @@ class RfcommAudioLink:
                 "Auto channel selection not implemented yet"
             )
         self._client = RfcommClient(device_uuid, channel, read_size)
-        self._buffer = bytes()
+        self._deframer = p.AudioDeframer()
 
     async def send(self, msg: p.AudioMessage) -> None:
-        await self.send_bytes(p.audio_message_to_bytes(msg))
+        await self.send_many((msg,))
 
-    async def send_bytes(self, data: bytes) -> None:
+    async def send_many(self, msgs: t.Sequence[p.AudioMessage]) -> None:
+        # The frames are written with a single sendall
+        buf = bytearray()
+        for msg in msgs:
+            p.write_audio_frame(buf, msg)
+        await self.send_bytes(buf)
+
+    async def send_bytes(self, data: bytes | bytearray) -> None:
         await self._client.write(data)
 
     async def connect(self, callback: t.Callable[[p.AudioMessage], None]):
-        def on_data(data: bytes):
-            self._buffer = self._buffer + data
-
-            if len(self._buffer) == 0:
-                return
+        def on_batch(messages: t.List[p.AudioMessage]):
+            for message in messages:
+                callback(message)
 
-            while len(self._buffer):
-                message, self._buffer = p.next_audio_message(self._buffer)
+        await self.connect_batch(on_batch)
 
-                if message is None:
-                    break
+    async def connect_batch(self, callback: t.Callable[[t.List[p.AudioMessage]], None]):
+        def on_data(data: bytes):
+            messages = self._deframer.feed(data)
 
-                callback(message)
+            if messages:
+                callback(messages)
 
         await self._client.connect(on_data)
 
@@ -208,7 +245,7 @@ class RfcommClient:
     def is_connected(self) -> bool:
         return self._st is not None
 
-    async def write(self, data: bytes):
+    async def write(self, data: bytes | bytearray):
         if self._st is None:
             raise RuntimeError("Not connected")
 
@@ -4,27 +4,26 @@ import sys
 
 
 def unescape_bytes(b: bytes) -> bytes:
+    i = b.find(0x7d)
+
+    if i == -1:
+        return bytes(b)
+
     out = bytearray()
-    i = 0
-    while i < len(b):
-        if b[i] == 0x7d:
-            i += 1
-            out.append(b[i] ^ 0x20)
-        else:
-            out.append(b[i])
-        i += 1
+    start = 0
+    while i != -1:
+        out += b[start:i]
+        out.append(b[i+1] ^ 0x20)
+        start = i + 2
+        i = b.find(0x7d, start)
+    out += b[start:]
     return bytes(out)
 
 
 def escape_bytes(b: bytes) -> bytes:
-    out = bytearray()
-    for byte in b:
-        if byte in (0x7d, 0x7e):
-            out.append(0x7d)
-            out.append(byte ^ 0x20)
-        else:
-            out.append(byte)
-    return bytes(out)
+    # 0x7d has to be escaped first, so the escape bytes inserted for 0x7e
+    # don't get escaped again
+    return bytes(b).replace(b'\x7d', b'\x7d\x5d').replace(b'\x7e', b'\x7d\x5e')
 
 
 def framed_read_bytes(b: bytes, framing_char: bytes) -> t.Tuple[bytes | None, bytes]:
@@ -51,6 +50,63 @@ def next_audio_message(b: bytes) -> t.Tuple[AudioMessage | None, bytes]:
     return audio_message_from_bytes(frame), rest
 
 
+AUDIO_DEFRAMER_COMPACT_SIZE = 4096
+"""@private"""
+
+
+class AudioDeframer:
+    """Incrementally splits a byte stream into 0x7e-framed AudioMessages"""
+    _buffer: bytearray
+    _pos: int  # start of the unconsumed data in _buffer
+    _scan: int  # where to resume looking for the end of a partial frame
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._pos = 0
+        self._scan = 0
+
+    def feed(self, data: bytes) -> t.List[AudioMessage]:
+        buf = self._buffer
+        buf += data
+
+        frames: t.List[bytes] = []
+        pos = self._pos
+
+        while True:
+            start = buf.find(0x7e, pos)
+
+            if start == -1:
+                if pos != len(buf):
+                    print("Warning: Discarding garbage audio data", file=sys.stderr)
+                pos = len(buf)
+                break
+
+            if start != pos:
+                print("Warning: Discarding garbage audio data", file=sys.stderr)
+                pos = start
+
+            end = buf.find(0x7e, max(start + 1, self._scan))
+
+            if end == -1:
+                self._scan = len(buf)
+                break
+
+            frames.append(bytes(buf[start:end+1]))
+            pos = end + 1
+            self._scan = 0
+
+        # Consumed bytes are only dropped from the front of the buffer once
+        # in a while, so each byte is copied a bounded number of times
+        if pos == len(buf) or pos >= AUDIO_DEFRAMER_COMPACT_SIZE:
+            del buf[:pos]
+            self._scan = max(self._scan - pos, 0)
+            pos = 0
+
+        self._pos = pos
+
+        return [audio_message_from_bytes(frame) for frame in frames]
+
+
 def audio_message_from_bytes(frame: bytes) -> AudioMessage:
     assert len(frame) > 3
     assert frame[0] == 0x7e
@@ -69,18 +125,31 @@ def audio_message_from_bytes(frame: bytes) -> AudioMessage:
             return AudioUnknown(type=unescaped_frame[0], data=unescaped_frame[1:])
 
 
-def audio_message_to_bytes(msg: AudioMessage) -> bytes:
+def write_audio_frame(out: bytearray, msg: AudioMessage) -> None:
     match msg:
         case AudioData(sbc_data=sbc_data):
-            unescaped_frame = b'\x00' + sbc_data
+            type, data = 0x00, sbc_data
         case AudioEnd():
-            unescaped_frame = b'\x01' + b'\x00' * 8
+            type, data = 0x01, b'\x00' * 8
         case AudioAck():
-            unescaped_frame = b'\x02' + b'\x00' * 8
+            type, data = 0x02, b'\x00' * 8
         case AudioUnknown(type=type, data=data):
-            unescaped_frame = bytes([type]) + data
+            pass
+
+    out.append(0x7e)
+    if type in (0x7d, 0x7e):
+        out.append(0x7d)
+        out.append(type ^ 0x20)
+    else:
+        out.append(type)
+    out += escape_bytes(data)
+    out.append(0x7e)
+
 
-    return b'\x7e' + escape_bytes(unescaped_frame) + b'\x7e'
+def audio_message_to_bytes(msg: AudioMessage) -> bytes:
+    out = bytearray()
+    write_audio_frame(out, msg)
+    return bytes(out)
 
 
 class AudioData(t.NamedTuple):
@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing_extensions import dataclass_transform, TypeVar as TypeVarDefault, Self
 import typing as t
 import inspect
+import struct
+import functools
 
 from enum import IntEnum, IntFlag, Enum
 
@@ -26,11 +28,89 @@ def reorder_pairs(order: t.Sequence[int], size: int):
     )
 
 
-class Bits(t.Tuple[bool, ...]):
-    def __new__(cls, bits: t.Iterable[bool] | str = ()) -> Bits:
+PermutationRuns = t.Tuple[t.Tuple[int, int, int], ...]
+
+
+class BitPermutation(t.NamedTuple):
+    # Runs of (src_shift, mask, dst_shift) over an int holding `size` bits,
+    # MSB first. Contiguous indices in the reordering are moved as one run.
+    forward: PermutationRuns
+    inverse: PermutationRuns
+
+
+def permutation_runs(perm: t.Sequence[int], size: int) -> PermutationRuns:
+    # Output bit j is taken from input bit perm[j]
+    acc: t.List[t.Tuple[int, int, int]] = []
+    start = 0
+    for j in range(1, size + 1):
+        if j < size and perm[j] == perm[j-1] + 1:
+            continue
+        length = j - start
+        acc.append((size - perm[start] - length, (1 << length) - 1, size - j))
+        start = j
+    return tuple(acc)
+
+
+@functools.lru_cache(maxsize=256)
+def bit_permutation(order: t.Tuple[int, ...], size: int) -> BitPermutation:
+    perm = [i for _, i in reorder_pairs(order, size)]
+    inverse = [0] * size
+    for j, i in enumerate(perm):
+        inverse[i] = j
+    return BitPermutation(
+        permutation_runs(perm, size), permutation_runs(inverse, size)
+    )
+
+
+def permute_int(x: int, runs: PermutationRuns) -> int:
+    acc = 0
+    for src_shift, mask, dst_shift in runs:
+        acc |= ((x >> src_shift) & mask) << dst_shift
+    return acc
+
+
+class Bits(t.Sequence[bool]):
+    __slots__ = ("_value", "_n")
+
+    # Bits are stored MSB-first as a single int, so bit 0 of the sequence is
+    # the most significant bit of `_value`.
+    _value: int
+    _n: int
+
+    def __init__(self, bits: t.Iterable[bool] | str = ()) -> None:
+        if isinstance(bits, Bits):
+            self._value, self._n = bits._value, bits._n
+            return
+
         if isinstance(bits, str):
-            bits = (bit == "1" for bit in bits if bit in ("0", "1"))
-        return super().__new__(cls, tuple(bits))
+            str_bits = "".join(bit for bit in bits if bit in ("0", "1"))
+            self._value = int(str_bits, 2) if str_bits else 0
+            self._n = len(str_bits)
+            return
+
+        value = 0
+        n = 0
+        for bit in bits:
+            value = (value << 1) | (1 if bit else 0)
+            n += 1
+
+        self._value = value
+        self._n = n
+
+    @classmethod
+    def _from_int_unchecked(cls, value: int, n_bits: int) -> Bits:
+        out = cls.__new__(cls)
+        out._value = value
+        out._n = n_bits
+        return out
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> t.Iterator[bool]:
+        value = self._value
+        for shift in range(self._n - 1, -1, -1):
+            yield (value >> shift) & 1 == 1
 
     @t.overload
     def __getitem__(self, index: t.SupportsIndex) -> bool:
@@ -42,31 +122,69 @@ class Bits(t.Tuple[bool, ...]):
 
     def __getitem__(self, index: t.SupportsIndex | slice) -> bool | Bits:
         if isinstance(index, slice):
-            return Bits(super().__getitem__(index))
-        return super().__getitem__(index)
+            start, stop, step = index.indices(self._n)
+
+            if step != 1:
+                return Bits(self[i] for i in range(start, stop, step))
+
+            if stop <= start:
+                return Bits()
+
+            n_bits = stop - start
+            value = (self._value >> (self._n - stop)) & ((1 << n_bits) - 1)
+
+            return Bits._from_int_unchecked(value, n_bits)
+
+        i = index.__index__()
+
+        if i < 0:
+            i += self._n
+
+        if not 0 <= i < self._n:
+            raise IndexError("Bits index out of range")
+
+        return (self._value >> (self._n - i - 1)) & 1 == 1
+
+    def __add__(self, other: t.Iterable[object]) -> Bits:
+        if not isinstance(other, Bits):
+            other = Bits(bool(bit) for bit in other)
+
+        return Bits._from_int_unchecked(
+            (self._value << other._n) | other._value,
+            self._n + other._n,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Bits):
+            return self._n == other._n and self._value == other._value
+
+        if isinstance(other, tuple):
+            return tuple(self) == other
+
+        return NotImplemented
 
-    def __add__(self, other: t.Tuple[object, ...]) -> Bits:
-        return Bits(super().__add__(tuple(bool(bit) for bit in other)))
+    def __hash__(self) -> int:
+        return hash((self._value, self._n))
 
     def __repr__(self) -> str:
-        str_bits = "".join(str(int(bit)) for bit in self)
+        str_bits = format(self._value, f"0{self._n}b") if self._n else ""
         return f"{self.__class__.__name__}({str_bits!r})"
 
     def reorder(self, order: t.Sequence[int]):
         if not order:
             return self
 
-        pairs = reorder_pairs(order, len(self))
+        runs = bit_permutation(tuple(order), self._n).forward
 
-        return Bits(self[i] for _, i in pairs)
+        return Bits._from_int_unchecked(permute_int(self._value, runs), self._n)
 
     def unreorder(self, order: t.Sequence[int]):
         if not order:
             return self
 
-        pairs = sorted(reorder_pairs(order, len(self)), key=lambda x: x[1])
+        runs = bit_permutation(tuple(order), self._n).inverse
 
-        return Bits(self[i] for i, _ in pairs)
+        return Bits._from_int_unchecked(permute_int(self._value, runs), self._n)
 
     @classmethod
     def from_str(cls, data: str, encoding: str = "utf-8") -> Bits:
@@ -74,10 +192,7 @@ class Bits(t.Tuple[bool, ...]):
 
     @classmethod
     def from_bytes(cls, data: t.ByteString) -> Bits:
-        bits: t.List[bool] = []
-        for byte in data:
-            bits += cls.from_int(byte, 8)
-        return cls(bits)
+        return cls._from_int_unchecked(int.from_bytes(data, "big"), len(data) * 8)
 
     @classmethod
     def from_int(cls, value: int, n_bits: int) -> Bits:
@@ -85,73 +200,142 @@ class Bits(t.Tuple[bool, ...]):
             raise ValueError("Number of bits must be positive")
         if value >= 1 << n_bits:
             raise ValueError(f"Value {value} is too large for {n_bits} bits")
-        return cls(
-            value & (1 << (n_bits - i - 1)) != 0 for i in range(n_bits)
-        )
+        return cls._from_int_unchecked(value & ((1 << n_bits) - 1), n_bits)
 
     def to_int(self) -> int:
-        out = 0
-        for i, bit in enumerate(self):
-            out |= bit << (len(self) - i - 1)
-        return out
+        return self._value
 
     def to_bytes(self) -> bytes:
-        if len(self) % 8:
+        if self._n % 8:
             raise ValueError("Bits is not byte aligned (multiple of 8 bits)")
-        return bytes(self[i:i+8].to_int() for i in range(0, len(self), 8))
+        return self._value.to_bytes(self._n // 8, "big")
 
     def to_str(self, encoding: str = "utf-8") -> str:
         return self.to_bytes().decode(encoding)
 
 
 class BitStream:
-    _bits: Bits
+    __slots__ = ("_buf", "_pos", "_end")
+
+    # A read-only cursor over a byte buffer. `_pos` and `_end` are bit offsets
+    # into `_buf`; taking from the stream returns a new cursor that shares the
+    # same buffer, so values are only materialized for the fields that are read.
+    _buf: memoryview
     _pos: int
+    _end: int
 
     def __init__(self, bits: Bits = Bits(), pos: int = 0) -> None:
-        self._bits = bits
+        n_pad = -len(bits) % 8
+        data = (bits.to_int() << n_pad).to_bytes((len(bits) + n_pad) // 8, "big")
+        self._buf = memoryview(data)
         self._pos = pos
+        self._end = len(bits)
+
+    @classmethod
+    def from_bytes(cls, data: t.ByteString) -> BitStream:
+        if not isinstance(data, bytes):
+            # Copy mutable buffers so a view left alive (e.g. by a traceback)
+            # doesn't lock the caller's buffer against resizing
+            data = bytes(data)
+        buf = memoryview(data)
+        return cls._from_buffer(buf, 0, len(buf) * 8)
+
+    @classmethod
+    def _from_buffer(cls, buf: memoryview, pos: int, end: int) -> BitStream:
+        out = cls.__new__(cls)
+        out._buf = buf
+        out._pos = pos
+        out._end = end
+        return out
 
     def remaining(self):
-        return len(self._bits) - self._pos
+        return self._end - self._pos
 
-    def take(self, n: int):
-        if n > self.remaining():
+    def _read_int(self, n: int) -> int:
+        pos = self._pos
+        start = pos >> 3
+        stop = (pos + n + 7) >> 3
+        value = int.from_bytes(self._buf[start:stop], "big")
+        return (value >> ((stop << 3) - pos - n)) & ((1 << n) - 1)
+
+    def take_int(self, n: int):
+        if not 0 <= n <= self.remaining():
             raise EOFError
 
-        return Bits(self._bits[self._pos:n+self._pos]), BitStream(self._bits, self._pos+n)
+        return self._read_int(n), BitStream._from_buffer(self._buf, self._pos+n, self._end)
+
+    def take_aligned(self, n: int):
+        # Returns the underlying buffer and the byte offset of the stream
+        # position, for decoders that read the buffer directly
+        if not 0 <= n <= self.remaining():
+            raise EOFError
+
+        if self._pos & 7:
+            raise ValueError("BitStream is not byte aligned")
+
+        return self._buf, self._pos >> 3, BitStream._from_buffer(self._buf, self._pos+n, self._end)
+
+    def take(self, n: int):
+        value, stream = self.take_int(n)
+        return Bits._from_int_unchecked(value, n), stream
 
     def take_bytes(self, n: int):
-        value, stream = self.take(n*8)
-        return value.to_bytes(), stream
+        # A negative length (e.g. from a length computed from a too short
+        # input) would move the cursor backwards
+        if not 0 <= n*8 <= self.remaining():
+            raise EOFError
+
+        pos = self._pos
+        stream = BitStream._from_buffer(self._buf, pos + n*8, self._end)
+
+        if pos & 7:
+            return self._read_int(n*8).to_bytes(n, "big"), stream
+
+        return self._buf[pos >> 3:(pos >> 3) + n].tobytes(), stream
+
+    def take_stream(self, n: int):
+        if not 0 <= n <= self.remaining():
+            raise EOFError
+
+        return (
+            BitStream._from_buffer(self._buf, self._pos, self._pos+n),
+            BitStream._from_buffer(self._buf, self._pos+n, self._end),
+        )
 
     def peek(self, n: int = 1):
-        if n > self.remaining():
+        if not 0 <= n <= self.remaining():
             raise EOFError
 
-        return self._bits[self._pos:n+self._pos]
+        return Bits._from_int_unchecked(self._read_int(n), n)
 
     def peek_bytes(self, n: int):
         return self.peek(n*8).to_bytes()
 
     def __repr__(self) -> str:
-        str_bits = "".join(str(int(bit)) for bit in self._bits[self._pos:])
+        str_bits = "".join(str(int(bit)) for bit in self._rest())
         return f"{self.__class__.__name__}({str_bits})"
 
+    def _rest(self) -> Bits:
+        return self.peek(self.remaining())
+
     def extend(self, other: Bits):
         return BitStream(
-            self._bits[self._pos:] + other,
+            self._rest() + other,
         )
 
     def extend_bytes(self, data: bytes):
-        return self.extend(Bits.from_bytes(data))
+        if self._pos % 8 or self._end % 8:
+            return self.extend(Bits.from_bytes(data))
+
+        return BitStream.from_bytes(
+            self._buf[self._pos // 8:self._end // 8].tobytes() + data
+        )
 
     def reorder(self, order: t.Sequence[int]):
         if not order:
             return self
 
-        rebased = self._bits[self._pos:]
-        return BitStream(rebased.reorder(order))
+        return BitStream(self._rest().reorder(order))
 
 
 class AttrProxy(t.Mapping[str, t.Any]):
@@ -225,6 +409,48 @@ class IntScale(t.NamedTuple):
         return round(y / self.by)
 
 
+class BitsAsInt(t.NamedTuple):
+    n: int
+
+    def forward(self, x: Bits) -> int:
+        return x.to_int()
+
+    def back(self, y: int) -> Bits:
+        return Bits.from_int(y, self.n)
+
+
+class IntAsBool(t.NamedTuple):
+    def forward(self, x: int) -> bool:
+        return x == 1
+
+    def back(self, y: bool) -> int:
+        return 1 if y else 0
+
+
+class IntAsEnum(t.NamedTuple):
+    enum: t.Type[IntEnum | IntFlag]
+
+    def forward(self, x: int) -> IntEnum | IntFlag:
+        return self.enum(x)
+
+    def back(self, y: IntEnum | IntFlag) -> int:
+        return y.value
+
+
+class BytesAsStr(t.NamedTuple):
+    n: int
+    encoding: str
+
+    def forward(self, x: bytes) -> str:
+        return x.decode(self.encoding).rstrip("\0")
+
+    def back(self, y: str) -> bytes:
+        return y.ljust(self.n, "\0").encode(self.encoding)
+
+
+INT_AS_BOOL = IntAsBool()
+
+
 class BFBits(t.NamedTuple):
     n: int
     default: Bits | NotProvided
@@ -236,6 +462,11 @@ class BFList(t.NamedTuple):
     default: t.List[t.Any] | NotProvided
 
 
+class BFBytes(t.NamedTuple):
+    n: int  # in bytes
+    default: bytes | NotProvided
+
+
 class BFMap(t.NamedTuple):
     inner: BFType
     vm: ValueMapper[t.Any, t.Any]
@@ -245,11 +476,15 @@ class BFMap(t.NamedTuple):
 class BFDynSelf(t.NamedTuple):
     fn: t.Callable[[t.Any], BFTypeDisguised[t.Any]]
     default: t.Any | NotProvided
+    cache_by: t.Tuple[str, ...] | None = None
+    cache: t.Dict[t.Tuple[t.Any, ...], BFType] | None = None
 
 
 class BFDynSelfN(t.NamedTuple):
     fn: t.Callable[[t.Any, int], BFTypeDisguised[t.Any]]
     default: t.Any | NotProvided
+    cache_by: t.Tuple[str, ...] | None = None
+    cache: t.Dict[t.Tuple[t.Any, ...], BFType] | None = None
 
 
 class BFLit(t.NamedTuple):
@@ -270,6 +505,7 @@ class BFNone(t.NamedTuple):
 BFType = t.Union[
     BFBits,
     BFList,
+    BFBytes,
     BFMap,
     BFDynSelf,
     BFDynSelfN,
@@ -291,6 +527,9 @@ def bftype_length(bftype: BFType) -> int | None:
         case BFMap(inner=inner) | BFLit(inner=inner):
             return bftype_length(inner)
 
+        case BFBytes(n=n):
+            return n * 8
+
         case BFNone():
             return 0
 
@@ -298,9 +537,36 @@ def bftype_length(bftype: BFType) -> int | None:
             return None
 
 
+class FieldLayout(t.NamedTuple):
+    name: str
+    offset: int | None  # None if the field comes after a dynamic field
+    width: int | None  # None for dynamic fields
+    bftype: BFType
+
+
+def fields_layout(fields: t.Mapping[str, BFType]) -> t.Tuple[FieldLayout, ...]:
+    acc: t.List[FieldLayout] = []
+    offset: int | None = 0
+    for name, field in fields.items():
+        width = bftype_length(field)
+        acc.append(FieldLayout(name, offset, width, field))
+        if offset is not None:
+            offset = None if width is None else offset + width
+    return tuple(acc)
+
+
+def layout_length(layout: t.Sequence[FieldLayout]) -> int | None:
+    if not layout:
+        return 0
+    last = layout[-1]
+    if last.offset is None or last.width is None:
+        return None
+    return last.offset + last.width
+
+
 def bftype_has_children_with_default(bftype: BFType) -> bool:
     match bftype:
-        case BFBits() | BFBitfield() | BFNone() | BFDynSelf() | BFDynSelfN():
+        case BFBits() | BFBytes() | BFBitfield() | BFNone() | BFDynSelf() | BFDynSelfN():
             return False
 
         case BFList(inner=inner) | BFMap(inner=inner) | BFLit(inner=inner):
@@ -321,17 +587,20 @@ def bftype_from_bitstream(bftype: BFType, stream: BitStream, proxy: AttrProxy, o
                 acc.append(item)
             return acc, stream
 
+        case BFBytes(n=n):
+            return stream.take_bytes(n)
+
         case BFMap(inner=inner, vm=vm):
             value, stream = bftype_from_bitstream(
                 inner, stream, proxy, opts
             )
             return vm.forward(value), stream
 
-        case BFDynSelf(fn=fn):
-            return bftype_from_bitstream(undisguise(fn(proxy)), stream, proxy, opts)
+        case BFDynSelf():
+            return bftype_from_bitstream(resolve_dyn(bftype, proxy, None), stream, proxy, opts)
 
-        case BFDynSelfN(fn=fn):
-            return bftype_from_bitstream(undisguise(fn(proxy, stream.remaining())), stream, proxy, opts)
+        case BFDynSelfN():
+            return bftype_from_bitstream(resolve_dyn(bftype, proxy, stream.remaining()), stream, proxy, opts)
 
         case BFLit(inner=inner, default=default):
             value, stream = bftype_from_bitstream(
@@ -345,8 +614,35 @@ def bftype_from_bitstream(bftype: BFType, stream: BitStream, proxy: AttrProxy, o
             return None, stream
 
         case BFBitfield(inner=inner, n=n):
-            bits, stream = stream.take(n)
-            return inner.from_bits(bits, opts), stream
+            substream, stream = stream.take_stream(n)
+            return inner._from_bitstream_exact(substream, opts), stream
+
+
+DYN_CACHE_MAX_SIZE = 256
+
+
+def resolve_dyn(bftype: BFDynSelf | BFDynSelfN, proxy: AttrProxy, n: int | None) -> BFType:
+    def call():
+        match bftype:
+            case BFDynSelf(fn=fn):
+                return undisguise(fn(proxy))
+            case BFDynSelfN(fn=fn):
+                return undisguise(fn(proxy, t.cast(int, n)))
+
+    if bftype.cache_by is None or bftype.cache is None:
+        return call()
+
+    key = (*(proxy[name] for name in bftype.cache_by), n)
+
+    out = bftype.cache.get(key)
+
+    if out is None:
+        out = call()
+        if len(bftype.cache) >= DYN_CACHE_MAX_SIZE:
+            bftype.cache.clear()
+        bftype.cache[key] = out
+
+    return out
 
 
 def is_bitfield(x: t.Any) -> t.TypeGuard[Bitfield[t.Any]]:
@@ -369,11 +665,14 @@ def bftype_to_bits(bftype: BFType, value: t.Any, proxy: AttrProxy, opts: t.Any)
                 raise ValueError(f"expected {n} items, got {len(value)}")
             return sum([bftype_to_bits(inner, item, proxy, opts) for item in value], Bits())
 
+        case BFBytes(n=n):
+            return Bits._from_int_unchecked(check_bytes(value, n), n * 8)
+
         case BFMap(inner=inner, vm=vm):
             return bftype_to_bits(inner, vm.back(value), proxy, opts)
 
-        case BFDynSelf(fn=fn):
-            return bftype_to_bits(undisguise(fn(proxy)), value, proxy, opts)
+        case BFDynSelf():
+            return bftype_to_bits(resolve_dyn(bftype, proxy, None), value, proxy, opts)
 
         case BFDynSelfN(fn=fn):
             if is_bitfield(value):
@@ -409,6 +708,362 @@ def bftype_to_bits(bftype: BFType, value: t.Any, proxy: AttrProxy, opts: t.Any)
             return out
 
 
+class FieldCodec(t.NamedTuple):
+    n: int
+    decode: t.Callable[[int], t.Any]
+    encode: t.Callable[[t.Any], int]
+
+
+class FixedRun(t.NamedTuple):
+    n: int
+    decode: t.Callable[[int, t.Dict[str, t.Any]], None]
+    encode: t.Callable[[t.Any], int]
+    # Decodes the run straight from a byte buffer, using struct for its
+    # byte-aligned fields. Only usable when the stream is byte-aligned.
+    unpack: t.Callable[[memoryview, int, t.Dict[str, t.Any]], None] | None
+
+
+class DynField(t.NamedTuple):
+    name: str
+    bftype: BFType
+
+
+CodecStep = t.Union[FixedRun, DynField]
+
+
+def bftype_codec(bftype: BFType) -> FieldCodec | None:
+    # Returns a codec that converts the field to / from an int of fixed width,
+    # or None if the field has to be handled by the interpreter
+    match bftype:
+        case BFBits(n=n):
+            def decode_bits(x: int):
+                return Bits._from_int_unchecked(x, n)
+
+            def encode_bits(y: t.Any):
+                if len(y) != n:
+                    raise ValueError(f"expected {n} bits, got {len(y)}")
+                return Bits(y).to_int()
+
+            return FieldCodec(n, decode_bits, encode_bits)
+
+        case BFList(inner=inner, n=n):
+            item = bftype_codec(inner)
+            if item is None:
+                return None
+
+            item_n = item.n
+            item_mask = (1 << item_n) - 1
+            item_decode = item.decode
+            item_encode = item.encode
+            shifts = tuple(item_n * i for i in reversed(range(n)))
+
+            def decode_list(x: int):
+                return [item_decode((x >> shift) & item_mask) for shift in shifts]
+
+            def encode_list(y: t.Any):
+                if len(y) != n:
+                    raise ValueError(f"expected {n} items, got {len(y)}")
+                acc = 0
+                for value in y:
+                    acc = (acc << item_n) | item_encode(value)
+                return acc
+
+            return FieldCodec(item_n * n, decode_list, encode_list)
+
+        case BFBytes(n=n):
+            def decode_bytes(x: int):
+                return x.to_bytes(n, "big")
+
+            def encode_bytes(y: t.Any):
+                return check_bytes(y, n)
+
+            return FieldCodec(n * 8, decode_bytes, encode_bytes)
+
+        case BFMap(inner=inner, vm=vm):
+            inner_codec = bftype_codec(inner)
+            if inner_codec is None:
+                return None
+
+            inner_decode = inner_codec.decode
+            inner_encode = inner_codec.encode
+            forward = vm.forward
+            back = vm.back
+
+            def decode_map(x: int):
+                return forward(inner_decode(x))
+
+            def encode_map(y: t.Any):
+                return inner_encode(back(y))
+
+            return FieldCodec(inner_codec.n, decode_map, encode_map)
+
+        case BFLit(inner=inner, default=default):
+            inner_codec = bftype_codec(inner)
+            if inner_codec is None:
+                return None
+
+            inner_decode = inner_codec.decode
+            inner_encode = inner_codec.encode
+
+            def decode_lit(x: int):
+                value = inner_decode(x)
+                if value != default:
+                    raise ValueError(f"expected {default!r}, got {value!r}")
+                return value
+
+            def encode_lit(y: t.Any):
+                if y != default:
+                    raise ValueError(f"expected {default!r}, got {y!r}")
+                return inner_encode(y)
+
+            return FieldCodec(inner_codec.n, decode_lit, encode_lit)
+
+        case BFNone():
+            def decode_none(x: int):
+                return None
+
+            def encode_none(y: t.Any):
+                if y is not None:
+                    raise ValueError(f"expected None, got {y!r}")
+                return 0
+
+            return FieldCodec(0, decode_none, encode_none)
+
+        case BFBitfield(inner=inner, n=n):
+            if inner._fixed_run() is None or inner.length() != n:
+                return None
+
+            def decode_bitfield(x: int):
+                return inner._from_int(x)
+
+            def encode_bitfield(y: t.Any):
+                if type(y) is not inner:
+                    # Subclasses may have a different layout; let the
+                    # interpreter deal with them
+                    raise TypeError(
+                        f"expected {inner.__name__}, got {type(y).__name__}"
+                    )
+                return y._to_int()
+
+            return FieldCodec(n, decode_bitfield, encode_bitfield)
+
+        case BFDynSelf() | BFDynSelfN():
+            return None
+
+
+def _compile_fn(name: str, args: str, body: t.List[str], env: t.Dict[str, t.Any]):
+    src = f"def {name}({args}):\n" + "\n".join(f"    {line}" for line in body)
+    ns: t.Dict[str, t.Any] = {}
+    exec(src, env, ns)
+    return ns[name]
+
+
+def check_int(value: int, n: int) -> int:
+    if not 0 <= value < 1 << n:
+        return Bits.from_int(value, n).to_int()
+    return value
+
+
+def check_bytes(value: t.Any, n: int) -> int:
+    if isinstance(value, int):
+        raise TypeError(f"expected bytes, got {type(value).__name__}")
+    value = bytes(value)
+    if len(value) != n:
+        raise ValueError(f"expected {n} bytes, got {len(value)}")
+    return int.from_bytes(value, "big")
+
+
+def _bind(env: t.Dict[str, t.Any], prefix: str, value: t.Any) -> str:
+    name = f"{prefix}{len(env)}"
+    env[name] = value
+    return name
+
+
+def bftype_decode_expr(bftype: BFType, shift: int, env: t.Dict[str, t.Any], var: str = "x") -> str:
+    # Builds an expression that decodes the field stored at `shift` in `var`.
+    # Mappers, lists and literals are inlined so the generated code doesn't
+    # go through a stack of closures
+    n = t.cast(int, bftype_length(bftype))
+    src = f"(({var} >> {shift}) & {(1 << n) - 1:#x})"
+
+    match bftype:
+        case BFBits(n=n):
+            env["_bits"] = Bits._from_int_unchecked
+            return f"_bits({src}, {n})"
+
+        case BFMap(inner=BFBits(), vm=BitsAsInt()):
+            return src
+
+        case BFMap(inner=inner, vm=IntAsBool()):
+            return f"({bftype_decode_expr(inner, shift, env, var)} == 1)"
+
+        case BFMap(inner=inner, vm=IntAsEnum(enum=enum)):
+            inner_expr = bftype_decode_expr(inner, shift, env, var)
+            return f"{_bind(env, '_enum', enum)}({inner_expr})"
+
+        case BFMap(inner=inner, vm=vm):
+            inner_expr = bftype_decode_expr(inner, shift, env, var)
+            return f"{_bind(env, '_fwd', vm.forward)}({inner_expr})"
+
+        case BFList(inner=inner, n=n):
+            item_n = t.cast(int, bftype_length(inner))
+            items = (
+                bftype_decode_expr(inner, shift + item_n * i, env, var)
+                for i in reversed(range(n))
+            )
+            return f"[{', '.join(items)}]"
+
+        case BFBytes(n=n):
+            return f"{src}.to_bytes({n}, 'big')"
+
+        case BFLit(inner=inner, default=default):
+            def check_lit(value: t.Any):
+                if value != default:
+                    raise ValueError(f"expected {default!r}, got {value!r}")
+                return value
+
+            inner_expr = bftype_decode_expr(inner, shift, env, var)
+            return f"{_bind(env, '_lit', check_lit)}({inner_expr})"
+
+        case BFNone():
+            return "None"
+
+        case _:
+            codec = t.cast(FieldCodec, bftype_codec(bftype))
+            return f"{_bind(env, '_dec', codec.decode)}({src})"
+
+
+def bftype_encode_expr(bftype: BFType, codec: FieldCodec, src: str, env: t.Dict[str, t.Any]) -> str:
+    match bftype:
+        case BFMap(inner=BFBits(n=n), vm=BitsAsInt()):
+            env["_check_int"] = check_int
+            return f"_check_int({src}, {n})"
+
+        case BFBytes(n=n):
+            env["_check_bytes"] = check_bytes
+            return f"_check_bytes({src}, {n})"
+
+        case BFMap(inner=inner, vm=IntAsBool()):
+            inner_codec = t.cast(FieldCodec, bftype_codec(inner))
+            return bftype_encode_expr(inner, inner_codec, f"(1 if {src} else 0)", env)
+
+        case BFMap(inner=inner, vm=IntAsEnum()):
+            inner_codec = t.cast(FieldCodec, bftype_codec(inner))
+            return bftype_encode_expr(inner, inner_codec, f"{src}.value", env)
+
+        case BFMap(inner=inner, vm=vm):
+            inner_codec = t.cast(FieldCodec, bftype_codec(inner))
+            back_expr = f"{_bind(env, '_back', vm.back)}({src})"
+            return bftype_encode_expr(inner, inner_codec, back_expr, env)
+
+        case _:
+            return f"{_bind(env, '_enc', codec.encode)}({src})"
+
+
+_STRUCT_FORMATS = {8: "B", 16: "H", 32: "I", 64: "Q"}
+
+
+def compile_unpack(fields: t.Sequence[FieldLayout], env: t.Dict[str, t.Any]):
+    # Runs made up entirely of byte-aligned fields are decoded straight from
+    # the buffer with a precompiled struct.Struct. Runs with bit-packed fields
+    # stay on the shift / mask decoder: splitting them into struct and
+    # bit-packed segments measured slower than shifting a single int.
+    widths = [t.cast(int, f.width) for f in fields]
+
+    if not any(widths) or any(width % 8 for width in widths):
+        return None
+
+    def is_raw(f: FieldLayout):
+        # Plain bytes fields are taken straight from the unpacked value
+        return isinstance(f.bftype, BFBytes)
+
+    def fmt_of(f: FieldLayout, width: int):
+        if is_raw(f):
+            return f"{width // 8}s"
+        return _STRUCT_FORMATS.get(width, f"{width // 8}s")
+
+    env["_int"] = int.from_bytes
+    fmt = ">" + "".join(
+        fmt_of(f, width) for f, width in zip(fields, widths) if width
+    )
+    names = [f"v{i}" for i, width in enumerate(widths) if width]
+
+    lines = [
+        f"{', '.join(names)}, = {_bind(env, '_s', struct.Struct(fmt))}.unpack_from(buf, pos)"
+    ]
+
+    for i, (f, width) in enumerate(zip(fields, widths)):
+        if not width:
+            lines.append(
+                f"out[{f.name!r}] = {bftype_decode_expr(f.bftype, 0, env, '0')}"
+            )
+            continue
+        if is_raw(f):
+            lines.append(f"out[{f.name!r}] = v{i}")
+            continue
+        if width not in _STRUCT_FORMATS:
+            lines.append(f"v{i} = _int(v{i}, 'big')")
+        lines.append(
+            f"out[{f.name!r}] = {bftype_decode_expr(f.bftype, 0, env, f'v{i}')}"
+        )
+
+    return _compile_fn("unpack", "buf, pos, out", lines, env)
+
+
+def compile_fixed_run(fields: t.Sequence[t.Tuple[FieldLayout, FieldCodec]]) -> FixedRun:
+    # Generates straight-line code that decodes / encodes a run of fixed-width
+    # fields with shifts and masks over a single int
+    n = sum(codec.n for _, codec in fields)
+
+    env: t.Dict[str, t.Any] = {}
+    decode_lines: t.List[str] = []
+    encode_terms: t.List[str] = []
+    run_layout: t.List[FieldLayout] = []
+
+    offset = 0
+    for field, codec in fields:
+        shift = n - offset - codec.n
+        decode_lines.append(
+            f"out[{field.name!r}] = {bftype_decode_expr(field.bftype, shift, env)}"
+        )
+        encode_terms.append(
+            f"({bftype_encode_expr(field.bftype, codec, f'v.{field.name}', env)} << {shift})"
+        )
+        run_layout.append(field._replace(offset=offset))
+        offset += codec.n
+
+    decode = _compile_fn("decode", "x, out", decode_lines or ["pass"], env)
+    encode = _compile_fn(
+        "encode", "v", [f"return {' | '.join(encode_terms) or '0'}"], env
+    )
+    unpack = compile_unpack(run_layout, env)
+
+    return FixedRun(n, decode, encode, unpack)
+
+
+def compile_fields(layout: t.Sequence[FieldLayout]) -> t.Tuple[CodecStep, ...]:
+    steps: t.List[CodecStep] = []
+    run: t.List[t.Tuple[FieldLayout, FieldCodec]] = []
+
+    for field in layout:
+        codec = bftype_codec(field.bftype)
+
+        if codec is not None:
+            run.append((field, codec))
+            continue
+
+        if run:
+            steps.append(compile_fixed_run(run))
+            run = []
+
+        steps.append(DynField(field.name, field.bftype))
+
+    if run or not steps:
+        steps.append(compile_fixed_run(run))
+
+    return tuple(steps)
+
+
 BFTypeDisguised = t.Annotated[_T, "BFTypeDisguised"]
 
 
@@ -439,6 +1094,25 @@ def undisguise(x: BFTypeDisguised[t.Any]) -> BFType:
     raise TypeError(f"expected a field type, got {x!r}")
 
 
+# Field descriptors are immutable, so the ones built by the bf_* factories
+# below are shared between all fields with the same
+# (kind, width, enum, encoding)
+_FIELD_CACHE: t.Dict[t.Tuple[str, int, t.Any, str | None], BFType] = {}
+
+
+def cached_field(
+    key: t.Tuple[str, int, t.Any, str | None],
+    build: t.Callable[[], BFType],
+    default: t.Any | NotProvided = NOT_PROVIDED,
+) -> BFType:
+    out = _FIELD_CACHE.get(key)
+
+    if out is None:
+        out = _FIELD_CACHE[key] = build()
+
+    return out._replace(default=default) if is_provided(default) else out
+
+
 def bf_bits(n: int, *, default: Bits | NotProvided = NOT_PROVIDED) -> BFTypeDisguised[Bits]:
     return disguise(BFBits(n, default))
 
@@ -460,39 +1134,30 @@ def bf_int(n: int) -> BFTypeDisguised[int]: ...
 
 
 def bf_int(n: int, *, default: int | NotProvided = NOT_PROVIDED) -> BFTypeDisguised[int]:
-    class BitsAsInt:
-        def forward(self, x: Bits) -> int:
-            return x.to_int()
-
-        def back(self, y: int) -> Bits:
-            return Bits.from_int(y, n)
-
-    return bf_map(bf_bits(n), BitsAsInt(), default=default)
+    return disguise(cached_field(
+        ("int", n, None, None),
+        lambda: BFMap(BFBits(n, NOT_PROVIDED), BitsAsInt(n), NOT_PROVIDED),
+        default,
+    ))
 
 
 def bf_bool(*, default: bool | NotProvided = NOT_PROVIDED) -> BFTypeDisguised[bool]:
-    class IntAsBool:
-        def forward(self, x: int) -> bool:
-            return x == 1
-
-        def back(self, y: bool) -> int:
-            return 1 if y else 0
-
-    return bf_map(bf_int(1), IntAsBool(), default=default)
+    return disguise(cached_field(
+        ("bool", 1, None, None),
+        lambda: BFMap(undisguise(bf_int(1)), INT_AS_BOOL, NOT_PROVIDED),
+        default,
+    ))
 
 
 _E = t.TypeVar("_E", bound=IntEnum | IntFlag)
 
 
 def bf_int_enum(enum: t.Type[_E], n: int, *, default: _E | NotProvided = NOT_PROVIDED) -> BFTypeDisguised[_E]:
-    class IntAsEnum:
-        def forward(self, x: int) -> _E:
-            return enum(x)
-
-        def back(self, y: _E) -> int:
-            return y.value
-
-    return bf_map(bf_int(n), IntAsEnum(), default=default)
+    return disguise(cached_field(
+        ("int_enum", n, enum, None),
+        lambda: BFMap(undisguise(bf_int(n)), IntAsEnum(enum), NOT_PROVIDED),
+        default,
+    ))
 
 
 def bf_list(
@@ -525,14 +1190,9 @@ def bf_bytes(n: int, *, default: bytes | NotProvided = NOT_PROVIDED) -> BFTypeDi
             f"expected default bytes of length {n} bytes, got {len(default)} bytes ({default!r})"
         )
 
-    class ListAsBytes:
-        def forward(self, x: t.List[int]) -> bytes:
-            return bytes(x)
-
-        def back(self, y: bytes) -> t.List[int]:
-            return list(y)
-
-    return bf_map(bf_list(bf_int(8), n), ListAsBytes(), default=default)
+    return disguise(cached_field(
+        ("bytes", n, None, None), lambda: BFBytes(n, NOT_PROVIDED), default
+    ))
 
 
 def bf_str(n: int, encoding: str = "utf-8", *, default: str | NotProvided = NOT_PROVIDED) -> BFTypeDisguised[str]:
@@ -543,21 +1203,24 @@ def bf_str(n: int, encoding: str = "utf-8", *, default: str | NotProvided = NOT_
                 f"expected default string of maximum length {n} bytes, got {byte_len} bytes ({default!r})"
             )
 
-    class BytesAsStr:
-        def forward(self, x: bytes) -> str:
-            return x.decode(encoding).rstrip("\0")
-
-        def back(self, y: str) -> bytes:
-            return y.ljust(n, "\0").encode(encoding)
-
-    return bf_map(bf_bytes(n), BytesAsStr(), default=default)
+    return disguise(cached_field(
+        ("str", n, None, encoding),
+        lambda: BFMap(undisguise(bf_bytes(n)), BytesAsStr(n, encoding), NOT_PROVIDED),
+        default,
+    ))
 
 
 def bf_dyn(
     fn: t.Callable[[t.Any], t.Type[_T] | BFTypeDisguised[_T]] |
         t.Callable[[t.Any, int], t.Type[_T] | BFTypeDisguised[_T]],
-    default: _T | NotProvided = NOT_PROVIDED
+    default: _T | NotProvided = NOT_PROVIDED,
+    *,
+    cache_by: t.Sequence[str] | None = None,
 ) -> BFTypeDisguised[_T]:
+    # When `cache_by` is given, `fn` is assumed to depend only on those fields
+    # (and the number of bits remaining), so its result is memoized on them
+    cache_args = (None, None) if cache_by is None else (tuple(cache_by), {})
+
     n_params = len(inspect.signature(fn).parameters)
     match n_params:
         case 1:
@@ -565,14 +1228,14 @@ def bf_dyn(
                 t.Callable[[t.Any], t.Type[_T] | BFTypeDisguised[_T]],
                 fn
             )
-            return disguise(BFDynSelf(fn, default))
+            return disguise(BFDynSelf(fn, default, *cache_args))
         case 2:
             fn = t.cast(
                 t.Callable[
                     [t.Any, int], t.Type[_T] | BFTypeDisguised[_T]
                 ], fn
             )
-            return disguise(BFDynSelfN(fn, default))
+            return disguise(BFDynSelfN(fn, default, *cache_args))
         case _:
             raise ValueError(f"unsupported number of parameters: {n_params}")
 
@@ -612,6 +1275,10 @@ _DynOptsT = TypeVarDefault("_DynOptsT", default=None)
 class Bitfield(t.Generic[_DynOptsT]):
     _fields: t.ClassVar[t.Dict[str, BFType]] = {}
     _reorder: t.ClassVar[t.Sequence[int]] = []
+    _permutation: t.ClassVar[BitPermutation | None] = None
+    _layout: t.ClassVar[t.Tuple[FieldLayout, ...]] = ()
+    _codec: t.ClassVar[t.Tuple[CodecStep, ...]] = compile_fields(())
+    _length: t.ClassVar[int | None] = 0
     _DYN_OPTS_STR: t.ClassVar[str] = "dyn_opts"
     dyn_opts: _DynOptsT | None = None
 
@@ -647,22 +1314,52 @@ class Bitfield(t.Generic[_DynOptsT]):
 
     @classmethod
     def length(cls) -> int | None:
-        acc = 0
-        for field in cls._fields.values():
-            field_len = bftype_length(field)
-            if field_len is None:
+        return cls._length
+
+    @classmethod
+    def _fixed_run(cls) -> FixedRun | None:
+        match cls._codec:
+            case (FixedRun() as run,):
+                return run
+            case _:
                 return None
-            acc += field_len
-        return acc
+
+    @classmethod
+    def _from_values(cls, values: t.Dict[str, t.Any]):
+        out = cls.__new__(cls)
+        out.__dict__.update(values)
+        return out
+
+    @classmethod
+    def _from_int(cls, x: int):
+        run = t.cast(FixedRun, cls._fixed_run())
+
+        if cls._permutation is not None:
+            x = permute_int(x, cls._permutation.forward)
+
+        values: t.Dict[str, t.Any] = {}
+        run.decode(x, values)
+        return cls._from_values(values)
+
+    def _to_int(self) -> int:
+        run = t.cast(FixedRun, self._fixed_run())
+        x = run.encode(self)
+
+        if self._permutation is not None:
+            x = permute_int(x, self._permutation.inverse)
+
+        return x
 
     @classmethod
     def from_bytes(cls, data: t.ByteString, opts: _DynOptsT | None = None):
-        return cls.from_bits(Bits.from_bytes(data), opts)
+        return cls._from_bitstream_exact(BitStream.from_bytes(data), opts)
 
     @classmethod
     def from_bits(cls, bits: Bits, opts: _DynOptsT | None = None):
-        stream = BitStream(bits)
+        return cls._from_bitstream_exact(BitStream(bits), opts)
 
+    @classmethod
+    def _from_bitstream_exact(cls, stream: BitStream, opts: _DynOptsT | None = None):
         out, stream = cls.from_bitstream(stream, opts)
 
         if stream.remaining():
@@ -678,9 +1375,42 @@ class Bitfield(t.Generic[_DynOptsT]):
         stream: BitStream,
         opts: _DynOptsT | None = None
     ):
+        stream = stream.reorder(cls._reorder)
+
+        try:
+            return cls._from_bitstream_compiled(stream, opts)
+        except Exception:
+            # Re-run with the interpreter to get a detailed error message
+            pass
+
+        return cls._from_bitstream_interpreted(stream, opts)
+
+    @classmethod
+    def _from_bitstream_compiled(cls, stream: BitStream, opts: _DynOptsT | None):
         proxy: AttrProxy = AttrProxy({cls._DYN_OPTS_STR: opts})
+        values = proxy._data
+
+        for step in cls._codec:
+            match step:
+                case FixedRun(n=n, decode=decode, unpack=unpack):
+                    if unpack is not None and not stream._pos & 7:
+                        buf, pos, stream = stream.take_aligned(n)
+                        unpack(buf, pos, values)
+                    else:
+                        x, stream = stream.take_int(n)
+                        decode(x, values)
+                case DynField(name=name, bftype=bftype):
+                    values[name], stream = bftype_from_bitstream(
+                        bftype, stream, proxy, opts
+                    )
 
-        stream = stream.reorder(cls._reorder)
+        del values[cls._DYN_OPTS_STR]
+
+        return cls._from_values(values), stream
+
+    @classmethod
+    def _from_bitstream_interpreted(cls, stream: BitStream, opts: _DynOptsT | None):
+        proxy: AttrProxy = AttrProxy({cls._DYN_OPTS_STR: opts})
 
         for name, field in cls._fields.items():
             try:
@@ -721,6 +1451,39 @@ class Bitfield(t.Generic[_DynOptsT]):
         return out, stream
 
     def to_bits(self, opts: _DynOptsT | None = None) -> Bits:
+        try:
+            return self._to_bits_compiled(opts).unreorder(self._reorder)
+        except Exception:
+            # Re-run with the interpreter to get a detailed error message
+            pass
+
+        return self._to_bits_interpreted(opts).unreorder(self._reorder)
+
+    def _to_bits_compiled(self, opts: _DynOptsT | None) -> Bits:
+        proxy: AttrProxy | None = None
+
+        acc = 0
+        n = 0
+
+        for step in self._codec:
+            match step:
+                case FixedRun(n=run_n, encode=encode):
+                    acc = (acc << run_n) | encode(self)
+                    n += run_n
+                case DynField(name=name, bftype=bftype):
+                    if proxy is None:
+                        proxy = AttrProxy(
+                            {**self.__dict__, self._DYN_OPTS_STR: opts}
+                        )
+                    bits = bftype_to_bits(
+                        bftype, getattr(self, name), proxy, opts
+                    )
+                    acc = (acc << len(bits)) | bits.to_int()
+                    n += len(bits)
+
+        return Bits._from_int_unchecked(acc, n)
+
+    def _to_bits_interpreted(self, opts: _DynOptsT | None) -> Bits:
         proxy = AttrProxy({**self.__dict__, self._DYN_OPTS_STR: opts})
 
         acc: Bits = Bits()
@@ -735,7 +1498,7 @@ class Bitfield(t.Generic[_DynOptsT]):
                     f"error in field {name!r} of {self.__class__.__name__!r}: {e}"
                 ) from e
 
-        return acc.unreorder(self._reorder)
+        return acc
 
     def to_bytes(self, opts: _DynOptsT | None = None) -> bytes:
         return self.to_bits(opts).to_bytes()
@@ -764,6 +1527,14 @@ class Bitfield(t.Generic[_DynOptsT]):
 
             cls._fields[name] = bf_field
 
+        cls._layout = fields_layout(cls._fields)
+        cls._length = layout_length(cls._layout)
+        cls._codec = compile_fields(cls._layout)
+        cls._permutation = (
+            bit_permutation(tuple(cls._reorder), cls._length)
+            if cls._reorder and cls._length is not None else None
+        )
+
 
 def distill_field(type_hint: t.Any, value: t.Any) -> BFType:
     if value is NOT_PROVIDED:
@@ -70,12 +70,15 @@ def bss_settings_reply_disc(reply: ReadBSSSettingsReplyBody, n: int):
 
 class ReadBSSSettingsReplyBody(Bitfield):
     reply_status: ReplyStatus = bf_int_enum(ReplyStatus, 8)
-    bss_settings: BSSSettings | BSSSettingsV2 | None = bf_dyn(bss_settings_reply_disc)
+    bss_settings: BSSSettings | BSSSettingsV2 | None = bf_dyn(
+        bss_settings_reply_disc, cache_by=("reply_status",)
+    )
 
 
 class WriteBSSSettingsBody(Bitfield):
     bss_settings: BSSSettings | BSSSettingsV2 = bf_dyn(
-        lambda _, n: BSSSettings if n == BSSSettings.length() else BSSSettingsV2
+        lambda _, n: BSSSettings if n == BSSSettings.length() else BSSSettingsV2,
+        cache_by=(),
     )
 
 
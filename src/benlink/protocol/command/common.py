@@ -18,8 +18,10 @@ class TncDataFragment(Bitfield):
     with_channel_id: bool
     fragment_id: int = bf_int(6)
     data: bytes = bf_dyn(
-        lambda x, n: bf_bytes((n - 1 if x.with_channel_id else n) // 8)
+        lambda x, n: bf_bytes((n - 1 if x.with_channel_id else n) // 8),
+        cache_by=("with_channel_id",),
     )
     channel_id: int | None = bf_dyn(
-        lambda x: bf_int(8) if x.with_channel_id else None
+        lambda x: bf_int(8) if x.with_channel_id else None,
+        cache_by=("with_channel_id",),
     )
@@ -36,5 +36,6 @@ class GetDevInfoReplyBody(Bitfield):
     dev_info: DevInfo | None = bf_dyn(
         lambda x: DevInfo
         if x.reply_status == ReplyStatus.SUCCESS
-        else None
+        else None,
+        cache_by=("reply_status",),
     )
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from enum import IntFlag
 import typing as t
+import sys
+import operator
+import functools
 
 from .bitfield import Bitfield, bf_int, bf_int_enum, bf_dyn, bf_bytes
 
@@ -28,5 +31,82 @@ class GaiaFrame(Bitfield):
     n_bytes_payload: int = bf_int(8)
     data: bytes = bf_dyn(lambda x: bf_bytes(
         x.n_bytes_payload + 4  # Full data length is 4 command bytes + n_bytes_payload
-    ))
-    checksum: int | None = bf_dyn(checksum_disc, default=None)
+    ), cache_by=("n_bytes_payload",))
+    checksum: int | None = bf_dyn(
+        checksum_disc, default=None, cache_by=("flags",)
+    )
+
+
+GAIA_SYNC = b'\xff\x01'
+"""@private"""
+
+
+def gaia_checksum(frame: bytes) -> int:
+    """XOR of all frame bytes preceding the checksum"""
+    return functools.reduce(operator.xor, frame, 0)
+
+
+GAIA_HEADER_SIZE = 4
+"""@private"""
+
+
+class GaiaDeframer:
+    """Incrementally splits a byte stream into GaiaFrame data (command bytes + payload)"""
+    _buffer: bytearray
+    _verify_checksum: bool
+
+    def __init__(self, verify_checksum: bool = True):
+        self._buffer = bytearray()
+        self._verify_checksum = verify_checksum
+
+    def feed(self, data: bytes) -> t.List[bytes]:
+        buf = self._buffer
+        buf += data
+
+        out: t.List[bytes] = []
+        pos = 0
+        resync = False
+
+        while True:
+            start = buf.find(GAIA_SYNC, pos)
+
+            if start == -1:
+                # Keep a trailing 0xff, it may be the start of the next frame
+                pos = len(buf) - 1 if buf.endswith(GAIA_SYNC[:1]) else len(buf)
+                break
+
+            if start != pos and not resync:
+                print("Warning: Discarding garbage GAIA data", file=sys.stderr)
+
+            if len(buf) - start < GAIA_HEADER_SIZE:
+                pos = start
+                break
+
+            flags = buf[start + 2]
+            n_bytes_data = buf[start + 3] + 4
+            data_start = start + GAIA_HEADER_SIZE
+            data_end = data_start + n_bytes_data
+            has_checksum = flags & GaiaFlags.CHECKSUM
+            end = data_end + (1 if has_checksum else 0)
+
+            if end > len(buf):
+                pos = start
+                break
+
+            if (
+                has_checksum and self._verify_checksum and
+                gaia_checksum(buf[start:data_end]) != buf[data_end]
+            ):
+                # Resync on the next sync marker; it may be inside this frame
+                print("Warning: Discarding GAIA frame with bad checksum", file=sys.stderr)
+                pos = start + 1
+                resync = True
+                continue
+
+            out.append(bytes(buf[data_start:data_end]))
+            pos = end
+            resync = False
+
+        del buf[:pos]
+
+        return out
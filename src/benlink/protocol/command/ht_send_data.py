@@ -5,7 +5,7 @@ from .common import ReplyStatus, TncDataFragment
 
 class HTSendDataBody(Bitfield):
     tnc_data_fragment: TncDataFragment = bf_dyn(
-        lambda _, n: bf_bitfield(TncDataFragment, n)
+        lambda _, n: bf_bitfield(TncDataFragment, n), cache_by=()
     )
 
 
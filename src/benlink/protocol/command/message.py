@@ -228,5 +228,24 @@ MessageBody = t.Union[
 class Message(Bitfield):
     command_group: CommandGroup = bf_int_enum(CommandGroup, 16)
     is_reply: bool = bf_bool()
-    command: BasicCommand | ExtendedCommand = bf_dyn(frame_type_disc)
-    body: MessageBody | bytes = bf_dyn(body_disc)
+    command: BasicCommand | ExtendedCommand = bf_dyn(frame_type_disc, cache_by=("command_group",))
+    body: MessageBody | bytes = bf_dyn(
+        body_disc, cache_by=("command_group", "command", "is_reply")
+    )
+
+
+_EVENT_NOTIFICATION_HEADER = (
+    CommandGroup.BASIC.to_bytes(2, "big")
+    + BasicCommand.EVENT_NOTIFICATION.to_bytes(2, "big")
+)
+
+
+def peek_event_type(data: bytes | bytearray) -> int | None:
+    """Read the event type of an encoded event notification Message without
+    decoding it. Returns None if `data` isn't an event notification.
+    """
+    # The header is a 16 bit command group, then the is_reply bit followed
+    # by the 15 bit command, so this also rules out replies
+    if len(data) < 5 or data[:4] != _EVENT_NOTIFICATION_HEADER:
+        return None
+    return data[4]
@@ -38,7 +38,7 @@ class HTSettingsChangedEvent(Bitfield):
 
 class DataRxdEvent(Bitfield):
     tnc_data_fragment: TncDataFragment = bf_dyn(
-        lambda _, n: bf_bitfield(TncDataFragment, n)
+        lambda _, n: bf_bitfield(TncDataFragment, n), cache_by=()
     )
 
 
@@ -51,11 +51,11 @@ def status_disc(_: HTSettingsChangedEvent, n: int):
 
 
 class HTStatusChangedEvent(Bitfield):
-    status: Status | StatusExt = bf_dyn(status_disc)
+    status: Status | StatusExt = bf_dyn(status_disc, cache_by=())
 
 
 class UnknownEvent(Bitfield):
-    data: bytes = bf_dyn(lambda _, n: bf_bytes(n // 8))
+    data: bytes = bf_dyn(lambda _, n: bf_bytes(n // 8), cache_by=())
 
 
 class HTChChangedEvent(Bitfield):
@@ -88,7 +88,7 @@ Event = t.Union[
 class EventNotificationBody(Bitfield):
     event_type: EventType = bf_int_enum(EventType, 8)
     event: Event = bf_dyn(
-        event_notification_disc
+        event_notification_disc, cache_by=("event_type",)
     )
 
 
@@ -79,7 +79,7 @@ def position_desc(body: GetPositionReplyBody):
 
 class GetPositionReplyBody(Bitfield):
     reply_status: ReplyStatus = bf_int_enum(ReplyStatus, 8)
-    position: Position | None = bf_dyn(position_desc)
+    position: Position | None = bf_dyn(position_desc, cache_by=("reply_status",))
 
 
 class GetPositionBody(Bitfield):
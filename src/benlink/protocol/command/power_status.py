@@ -54,7 +54,9 @@ def status_value_desc(m: PowerStatus):
 class PowerStatus(Bitfield):
     power_status_type: PowerStatusType = bf_int_enum(
         PowerStatusType, 16)
-    value: StatusValue = bf_dyn(status_value_desc)
+    value: StatusValue = bf_dyn(
+        status_value_desc, cache_by=("power_status_type",)
+    )
 
 
 def power_status_reply_desc(m: ReadPowerStatusReplyBody, n: int):
@@ -66,7 +68,9 @@ def power_status_reply_desc(m: ReadPowerStatusReplyBody, n: int):
 
 class ReadPowerStatusReplyBody(Bitfield):
     reply_status: ReplyStatus = bf_int_enum(ReplyStatus, 8)
-    status: PowerStatus | None = bf_dyn(power_status_reply_desc)
+    status: PowerStatus | None = bf_dyn(
+        power_status_reply_desc, cache_by=("reply_status",)
+    )
 
 
 class ReadPowerStatusBody(Bitfield):
@@ -98,13 +98,13 @@ class ReadRFChBody(Bitfield):
 class ReadRFChReplyBody(Bitfield):
     reply_status: ReplyStatus = bf_int_enum(ReplyStatus, 8)
     rf_ch: RfCh | RfChDMR | None = bf_dyn(
-        channel_settings_reply_disc
+        channel_settings_reply_disc, cache_by=("reply_status",)
     )
 
 
 class WriteRFChBody(Bitfield):
     rf_ch: RfCh | RfChDMR = bf_dyn(
-        channel_settings_disc
+        channel_settings_disc, cache_by=()
     )
 
 
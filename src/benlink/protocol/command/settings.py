@@ -76,7 +76,8 @@ class ReadSettingsBody(Bitfield):
 class ReadSettingsReplyBody(Bitfield):
     reply_status: ReplyStatus = bf_int_enum(ReplyStatus, 8)
     settings: Settings | None = bf_dyn(
-        lambda x: Settings if x.reply_status == ReplyStatus.SUCCESS else None
+        lambda x: Settings if x.reply_status == ReplyStatus.SUCCESS else None,
+        cache_by=("reply_status",),
     )
 
 
@@ -62,4 +62,6 @@ class GetHtStatusBody(Bitfield):
 
 class GetHtStatusReplyBody(Bitfield):
     reply_status: ReplyStatus = bf_int_enum(ReplyStatus, 8)
-    status: Status | StatusExt | None = bf_dyn(status_disc)
+    status: Status | StatusExt | None = bf_dyn(
+        status_disc, cache_by=("reply_status",)
+    )
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import typing as t
+import pytest
+
+from benlink import audio
+from benlink.link import RfcommAudioLink
+from benlink.protocol.audio import (
+    AudioAck,
+    AudioData,
+    AudioDeframer,
+    AudioEnd,
+    AudioMessage,
+    AudioUnknown,
+    audio_message_to_bytes,
+    escape_bytes,
+    next_audio_message,
+    unescape_bytes,
+    write_audio_frame,
+)
+
+
+def reference_unescape(b: bytes) -> bytes:
+    out = bytearray()
+    i = 0
+    while i < len(b):
+        if b[i] == 0x7d:
+            i += 1
+            out.append(b[i] ^ 0x20)
+        else:
+            out.append(b[i])
+        i += 1
+    return bytes(out)
+
+
+def reference_escape(b: bytes) -> bytes:
+    out = bytearray()
+    for byte in b:
+        if byte in (0x7d, 0x7e):
+            out.append(0x7d)
+            out.append(byte ^ 0x20)
+        else:
+            out.append(byte)
+    return bytes(out)
+
+
+def test_escape_matches_reference():
+    rng = random.Random(0)
+    alphabet = [0x00, 0x20, 0x5d, 0x5e, 0x7d, 0x7e, 0xff]
+
+    for size in range(64):
+        data = bytes(rng.choice(alphabet) for _ in range(size))
+        assert escape_bytes(data) == reference_escape(data)
+        assert unescape_bytes(escape_bytes(data)) == data
+
+        try:
+            expected = reference_unescape(data)
+        except IndexError:
+            with pytest.raises(IndexError):
+                unescape_bytes(data)
+        else:
+            assert unescape_bytes(data) == expected
+
+    assert unescape_bytes(b'\x7d\x7d\x7d\x5d') == b'\x5d\x7d'
+    assert escape_bytes(bytearray(b'a\x7eb')) == b'a\x7d\x5eb'
+
+    with pytest.raises(IndexError):
+        unescape_bytes(b'ab\x7d')
+
+
+def test_audio_deframer_matches_next_audio_message():
+    rng = random.Random(0)
+    messages = [
+        AudioData(sbc_data=bytes(rng.choice([0x7d, 0x7e, 0x01]) for _ in range(rng.randint(3, 40))))
+        for _ in range(200)
+    ] + [AudioEnd(), AudioAck(), AudioUnknown(type=5, data=b'\x7e\x7d\x00')]
+
+    stream = b''.join(audio_message_to_bytes(msg) for msg in messages)
+
+    expected: list[AudioMessage] = []
+    rest = stream
+    while rest:
+        msg, rest = next_audio_message(rest)
+        if msg is None:
+            break
+        expected.append(msg)
+
+    for chunk_size in (1, 5, 64, len(stream)):
+        deframer = AudioDeframer()
+        out: list[AudioMessage] = []
+        for i in range(0, len(stream), chunk_size):
+            out += deframer.feed(stream[i:i+chunk_size])
+        assert [type(msg) for msg in out] == [type(msg) for msg in expected]
+        assert [msg for msg in out if isinstance(msg, AudioData)] == [
+            msg for msg in expected if isinstance(msg, AudioData)
+        ]
+
+
+def test_audio_deframer_garbage():
+    frame = audio_message_to_bytes(AudioData(sbc_data=b'abc'))
+
+    deframer = AudioDeframer()
+    assert deframer.feed(b'junk') == []
+    assert deframer.feed(b'more' + frame[:3]) == []
+    assert deframer.feed(frame[3:]) == [AudioData(sbc_data=b'abc')]
+
+
+def test_write_audio_frame():
+    msgs: list[AudioMessage] = [
+        AudioData(sbc_data=b'a\x7eb\x7d'),
+        AudioEnd(),
+        AudioAck(),
+        AudioUnknown(type=0x7e, data=b'\x7d'),
+    ]
+
+    out = bytearray()
+    for msg in msgs:
+        write_audio_frame(out, msg)
+
+    assert bytes(out) == b''.join(audio_message_to_bytes(msg) for msg in msgs)
+    assert audio_message_to_bytes(msgs[0]) == b'\x7e\x00a\x7d\x5eb\x7d\x5d\x7e'
+    assert audio_message_to_bytes(msgs[3]) == b'\x7e\x7d\x5e\x7d\x5d\x7e'
+    assert audio_message_to_bytes(msgs[1]) == b'\x7e\x01' + b'\x00' * 8 + b'\x7e'
+
+
+class FakeRfcommClient:
+    on_data: t.Callable[[bytes], None]
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def connect(self, callback: t.Callable[[bytes], None]) -> None:
+        self.on_data = callback
+
+    async def disconnect(self) -> None:
+        pass
+
+
+def test_audio_connection_batches(monkeypatch: pytest.MonkeyPatch):
+    client = FakeRfcommClient()
+    link = RfcommAudioLink("00:11:22:33:44:55", channel=1)
+    link._client = t.cast(t.Any, client)
+    conn = audio.AudioConnection(link)
+
+    converted: list[AudioMessage] = []
+    original = audio.audio_message_from_protocol
+
+    def audio_message_from_protocol(msg: AudioMessage) -> audio.AudioMessage:
+        converted.append(msg)
+        return original(msg)
+
+    monkeypatch.setattr(audio, "audio_message_from_protocol", audio_message_from_protocol)
+
+    batches: list[list[audio.AudioEvent]] = []
+    messages: list[audio.AudioMessage] = []
+    conn.add_event_batch_handler(batches.append)
+    conn.add_event_handler(messages.append)
+    all_messages: list[audio.AudioMessage] = []
+    conn._add_message_handler(all_messages.append)
+
+    asyncio.run(conn.connect())
+
+    frames = [
+        audio_message_to_bytes(AudioData(sbc_data=b'a')),
+        audio_message_to_bytes(AudioAck()),
+        audio_message_to_bytes(AudioData(sbc_data=b'b')),
+        audio_message_to_bytes(AudioEnd()),
+    ]
+
+    client.on_data(frames[0] + frames[1] + frames[2][:2])
+    client.on_data(frames[2][2:] + frames[3])
+    client.on_data(b'')
+
+    expected = [
+        audio.AudioData(b'a'), audio.AudioAck(), audio.AudioData(b'b'), audio.AudioEnd(),
+    ]
+
+    # One batch per read, each message converted once
+    assert len(converted) == 4
+    assert [[type(e) for e in batch] for batch in batches] == [
+        [audio.AudioData], [audio.AudioData, audio.AudioEnd],
+    ]
+    assert batches[0][0] == expected[0] and batches[1][0] == expected[2]
+    assert all_messages[0] is batches[0][0] and messages[2] is batches[1][1]
+
+    # Per-message handlers still see every message, in order
+    assert [type(m) for m in all_messages] == [type(m) for m in expected]
+    assert [type(m) for m in messages] == [audio.AudioData, audio.AudioData, audio.AudioEnd]
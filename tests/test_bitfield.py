@@ -3,11 +3,13 @@ from __future__ import annotations
 import typing as t
 import pytest
 import re
+import random
 
 from enum import IntEnum
 
 from benlink.protocol.command.bitfield import (
     Bits,
+    BitStream,
     Bitfield,
     bf_str,
     bf_bytes,
@@ -17,7 +19,10 @@ from benlink.protocol.command.bitfield import (
     bf_map,
     bf_lit,
     bf_int_enum,
-    Scale
+    Scale,
+    undisguise,
+    reorder_pairs,
+    NOT_PROVIDED,
 )
 
 
@@ -241,3 +246,232 @@ def test_bit_reorder():
 
     assert b.reorder(order) == Bits("010110")
     assert b.reorder(order).unreorder(order) == b
+
+
+def test_bit_reorder_permutation():
+    rng = random.Random(0)
+
+    for size in range(1, 40):
+        bits = Bits(rng.random() < 0.5 for _ in range(size))
+        order = rng.sample(range(size), rng.randint(1, size))
+        pairs = list(reorder_pairs(order, size))
+
+        reordered = bits.reorder(order)
+        assert reordered == Bits(bits[i] for _, i in pairs)
+        assert reordered.unreorder(order) == bits
+
+    class Foo(Bitfield):
+        a: int = bf_int(4)
+        b: int = bf_int(4)
+        _reorder = [4, 5, 6, 7]
+
+    assert Foo._permutation is not None
+    assert Foo(a=1, b=2).to_bytes() == b'\x21'
+    assert Foo.from_bytes(b'\x21') == Foo(a=1, b=2)
+
+    with pytest.raises(ValueError, match="out-of-bounds"):
+        Bits("1010").reorder([4])
+
+
+def test_bits_int_backed():
+    b = Bits.from_bytes(b'\xa5\x0f')
+
+    assert len(b) == 16
+    assert b.to_int() == 0xa50f
+    assert b.to_bytes() == b'\xa5\x0f'
+    assert b[0] is True and b[1] is False and b[-1] is True
+    assert b[4:12] == Bits.from_int(0x50, 8)
+    assert b[::4] == Bits("1001")
+    assert b[:4] + b[12:] == Bits("10101111")
+    assert Bits("101") == (True, False, True)
+    assert list(Bits("0011")) == [False, False, True, True]
+    assert repr(Bits("0011")) == "Bits('0011')"
+
+    with pytest.raises(IndexError):
+        b[16]
+
+
+def test_bitstream_cursor():
+    stream = BitStream.from_bytes(bytearray(b'\xa5\x0f\xff'))
+
+    a, stream = stream.take(4)
+    b, stream = stream.take_int(8)
+    sub, stream = stream.take_stream(4)
+
+    assert a == Bits("1010")
+    assert b == 0x50
+    assert sub.remaining() == 4 and sub.peek(4) == Bits("1111")
+    assert stream.remaining() == 8
+
+    stream = stream.extend_bytes(b'\x01')
+    assert stream.take_bytes(2)[0] == b'\xff\x01'
+
+    with pytest.raises(EOFError):
+        stream.take(17)
+
+
+def test_compiled_field_errors():
+    class Work(Bitfield):
+        a: int = bf_int(4)
+        b: BarEnum = bf_int_enum(BarEnum, 2)
+        _pad: t.Literal[0] = bf_lit(bf_int(2), default=0)
+
+    assert Work.from_bytes(b'\x14') == Work(a=1, b=BarEnum.A)
+
+    with pytest.raises(ValueError, match=re.escape("error in field '_pad' of 'Work': expected 0, got 1")):
+        Work.from_bytes(b'\x15')
+
+    with pytest.raises(ValueError, match=re.escape("error in field 'a' of 'Work': Value 16 is too large for 4 bits")) as exc_info:
+        Work(a=16, b=BarEnum.A).to_bytes()
+
+    # Only the field's own error is chained onto the detailed error, not the
+    # failure of the compiled codec that fell back to the interpreter
+    def chain_length(e: BaseException | None) -> int:
+        return 0 if e is None else 1 + chain_length(e.__context__)
+
+    assert chain_length(exc_info.value) == 2
+
+    with pytest.raises(ValueError) as exc_info:
+        Work.from_bytes(b'\x15')
+
+    assert chain_length(exc_info.value) == 2
+
+    with pytest.raises(EOFError):
+        Work.from_bytes(b'')
+
+
+def test_failed_decode_releases_buffer():
+    class Work(Bitfield):
+        a: int = bf_int(16)
+
+    buf = bytearray(b'\x01')
+
+    try:
+        Work.from_bytes(buf)
+    except EOFError:
+        # The traceback is still alive here; the buffer must not be locked
+        buf.clear()
+
+    assert buf == bytearray()
+
+
+class AlignedInner(Bitfield):
+    a: int = bf_int(8)
+    b: int = bf_int(24)
+    c: bytes = bf_bytes(2)
+    d: int = bf_int(16)
+
+
+def test_aligned_layout():
+    class Outer(Bitfield):
+        pad: int = bf_int(4)
+        inner: AlignedInner = bf_dyn(lambda _: AlignedInner)
+        pad2: int = bf_int(4)
+
+    assert [(f.name, f.offset, f.width) for f in AlignedInner._layout] == [
+        ("a", 0, 8), ("b", 8, 24), ("c", 32, 16), ("d", 48, 16),
+    ]
+    assert [(f.offset, f.width) for f in Outer._layout] == [
+        (0, 4), (4, None), (None, 4),
+    ]
+
+    inner = AlignedInner(a=1, b=0x020304, c=b"hi", d=0xbeef)
+    assert inner.to_bytes() == b'\x01\x02\x03\x04hi\xbe\xef'
+    assert AlignedInner.from_bytes(inner.to_bytes()) == inner
+
+    # AlignedInner starts in the middle of a byte here, so it can't use the
+    # byte-aligned decoder
+    outer = Outer(pad=0xa, inner=inner, pad2=0x5)
+    assert Outer.from_bytes(outer.to_bytes()) == outer
+
+
+def test_dyn_cache_by():
+    calls: list[tuple[int, int]] = []
+
+    def disc(x: t.Any, n: int):
+        calls.append((x.a, n))
+        return bf_int(n) if x.a else bf_bytes(n // 8)
+
+    class Foo(Bitfield):
+        a: int = bf_int(8)
+        b: int | bytes = bf_dyn(disc, cache_by=("a",))
+
+    assert Foo.from_bytes(b'\x01\x02') == Foo(a=1, b=2)
+    assert Foo.from_bytes(b'\x01\x03') == Foo(a=1, b=3)
+    assert Foo.from_bytes(b'\x00\x03') == Foo(a=0, b=b'\x03')
+    assert Foo.from_bytes(b'\x01\x03\x04') == Foo(a=1, b=0x0304)
+    assert calls == [(1, 8), (0, 8), (1, 16)]
+
+
+
+class Color(IntEnum):
+    RED = 1
+    BLUE = 2
+
+
+def test_shared_field_descriptors():
+    assert undisguise(bf_int(8)) is undisguise(bf_int(8))
+    assert undisguise(bf_int_enum(Color, 4)) is undisguise(bf_int_enum(Color, 4))
+    assert undisguise(bf_str(4)) is undisguise(bf_str(4))
+    assert undisguise(bf_str(4)) is not undisguise(bf_str(4, "ascii"))
+    assert undisguise(bf_int(8, default=3)).default == 3
+    assert undisguise(bf_int(8)).default is NOT_PROVIDED
+
+    class Foo(Bitfield):
+        a: bool
+        b: Color = bf_int_enum(Color, 7)
+        c: str = bf_str(2)
+
+    foo = Foo(a=True, b=Color.BLUE, c="h")
+    assert foo.to_bytes() == b'\x82h\x00'
+    assert Foo.from_bytes(foo.to_bytes()) == foo
+
+
+def test_bytes_field():
+    stream = BitStream.from_bytes(b'\x0f\xf0abc')
+    value, rest = stream.take_bytes(1)
+    assert value == b'\x0f'
+    _, rest = rest.take(4)
+    value, rest = rest.take_bytes(1)
+    assert value == b'\x06'
+    assert rest.remaining() == 20
+
+    with pytest.raises(EOFError):
+        rest.take_bytes(3)
+
+    class Foo(Bitfield):
+        a: int = bf_int(4)
+        b: bytes = bf_bytes(2)
+        c: int = bf_int(4)
+        d: bytes = bf_dyn(lambda _, n: bf_bytes(n // 8))
+
+    foo = Foo(a=1, b=b'\xab\xcd', c=2, d=b'xyz')
+    assert foo.to_bytes() == b'\x1a\xbc\xd2xyz'
+    assert Foo.from_bytes(foo.to_bytes()) == foo
+
+    with pytest.raises(ValueError, match="expected 2 bytes, got 3"):
+        Foo(a=1, b=b'abc', c=2, d=b'').to_bytes()
+
+    with pytest.raises(TypeError):
+        Foo(a=1, b=2, c=2, d=b'').to_bytes()  # type: ignore
+
+
+def test_negative_lengths():
+    stream = BitStream.from_bytes(b'ab')
+    _, stream = stream.take_bytes(1)
+
+    for take in (stream.take_bytes, stream.take_int, stream.take_stream, stream.peek):
+        with pytest.raises(EOFError):
+            take(-1)
+
+    # A length computed from an input that is too short must not move
+    # the cursor backwards and read the same bytes twice
+    class Foo(Bitfield):
+        a: int = bf_int(8)
+        b: bytes = bf_dyn(lambda _, n: bf_bytes((n - 8) // 8))
+        c: int = bf_int(8)
+
+    assert Foo.from_bytes(b'\x01\x02') == Foo(a=1, b=b'', c=2)
+
+    with pytest.raises(EOFError):
+        Foo.from_bytes(b'\x01')
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import asyncio
+import typing as t
+import pytest
+
+from benlink import command, protocol as p
+from benlink.command import (
+    CommandConnection,
+    GetChannel,
+    GetChannelReply,
+    MessageReplyError,
+    ReplyTimeoutError,
+    StatusChangedEvent,
+    UnknownProtocolMessage,
+)
+
+
+class FakeLink:
+    sent: t.List[p.Message]
+
+    def __init__(self):
+        self.sent = []
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def send_bytes(self, data: bytes) -> None:
+        pass
+
+    async def send(self, msg: p.Message) -> None:
+        self.sent.append(msg)
+
+    async def connect(
+        self,
+        callback: t.Callable[[p.Message], None],
+        message_filter: t.Callable[[bytes | bytearray], bool] | None = None,
+    ) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+
+def read_rf_ch_reply(reply_status: p.ReplyStatus) -> p.Message:
+    return p.Message(
+        command_group=p.CommandGroup.BASIC,
+        is_reply=True,
+        command=p.BasicCommand.READ_RF_CH,
+        body=p.ReadRFChReplyBody(reply_status=reply_status, rf_ch=None),
+    )
+
+
+def test_replies_matched_in_order():
+    async def run():
+        link = FakeLink()
+        conn = CommandConnection(link)
+
+        first = asyncio.create_task(
+            conn.send_message_expect_reply(GetChannel(1), GetChannelReply)
+        )
+        second = asyncio.create_task(
+            conn.send_message_expect_reply(GetChannel(2), GetChannelReply)
+        )
+        await asyncio.sleep(0)
+
+        assert len(link.sent) == 2
+
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.NOT_SUPPORTED))
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.INVALID_PARAMETER))
+
+        assert await first == MessageReplyError(GetChannelReply, "NOT_SUPPORTED")
+        assert await second == MessageReplyError(GetChannelReply, "INVALID_PARAMETER")
+        assert conn._pending_replies == {}
+
+        # Unsolicited replies are ignored
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.NOT_SUPPORTED))
+
+    asyncio.run(run())
+
+
+def test_cancelled_request_is_removed():
+    async def run():
+        conn = CommandConnection(FakeLink(), reply_timeout=0.01)
+
+        task = asyncio.create_task(
+            conn.send_message_expect_reply(GetChannel(1), GetChannelReply)
+        )
+        await asyncio.sleep(0)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert conn.reply_metrics.cancellations == 1
+
+        # Its place in line is kept until its reply would have timed out
+        await asyncio.sleep(0.02)
+        assert conn._pending_replies == {}
+
+    asyncio.run(run())
+
+
+def test_request_cancelled_while_sending():
+    class SlowLink(FakeLink):
+        async def send(self, msg: p.Message) -> None:
+            await asyncio.sleep(1)
+
+    async def run():
+        link = SlowLink()
+        conn = CommandConnection(link)
+
+        task = asyncio.create_task(
+            conn.send_message_expect_reply(GetChannel(1), GetChannelReply)
+        )
+        await asyncio.sleep(0)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # It never went out, so no reply is expected for it
+        assert conn._pending_replies == {}
+
+    asyncio.run(run())
+
+
+def read_rf_ch_success_reply(channel_id: int) -> p.Message:
+    # channel_id is the first byte of an RfCh
+    rf_ch = p.RfCh.from_bytes(bytes([channel_id]) + bytes(p.RfCh.length() // 8 - 1))
+    return p.Message(
+        command_group=p.CommandGroup.BASIC,
+        is_reply=True,
+        command=p.BasicCommand.READ_RF_CH,
+        body=p.ReadRFChReplyBody(reply_status=p.ReplyStatus.SUCCESS, rf_ch=rf_ch),
+    )
+
+
+def test_reply_timeout(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(command, "LATE_REPLY_GRACE", 0.01)
+
+    async def run():
+        conn = CommandConnection(FakeLink(), reply_timeout=0.05)
+
+        def get_channel(channel_id: int, timeout: float | None | t.Literal["default"] = "default"):
+            return asyncio.create_task(
+                conn.send_message_expect_reply(GetChannel(channel_id), GetChannelReply, timeout)
+            )
+
+        with pytest.raises(ReplyTimeoutError):
+            await conn.send_message_expect_reply(GetChannel(1), GetChannelReply, timeout=0.01)
+
+        assert conn.reply_metrics.timeouts == 1
+
+        # The late reply isn't matched to the request waiting after it
+        second = get_channel(2)
+        await asyncio.sleep(0)
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.NOT_SUPPORTED))
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.INVALID_PARAMETER))
+        assert await second == MessageReplyError(GetChannelReply, "INVALID_PARAMETER")
+        assert conn.reply_metrics.orphaned_replies == 1
+
+        # Replies that carry the channel id are matched by it, even when
+        # they arrive after the reply to a later request
+        with pytest.raises(ReplyTimeoutError):
+            await conn.send_message_expect_reply(GetChannel(3), GetChannelReply, timeout=0.01)
+        fourth = get_channel(4)
+        await asyncio.sleep(0)
+        conn._on_recv(read_rf_ch_success_reply(4))
+        conn._on_recv(read_rf_ch_success_reply(3))
+        reply = await fourth
+        assert isinstance(reply, GetChannelReply) and reply.channel.channel_id == 4
+        assert conn.reply_metrics.orphaned_replies == 2
+        assert conn._pending_replies == {}
+
+        # If the timed out request's reply was lost, the next request gets
+        # its own reply once no other reply follows it
+        with pytest.raises(ReplyTimeoutError):
+            await conn.send_message_expect_reply(GetChannel(5), GetChannelReply, timeout=0.01)
+        sixth = get_channel(6)
+        await asyncio.sleep(0)
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.NOT_SUPPORTED))
+        assert await sixth == MessageReplyError(GetChannelReply, "NOT_SUPPORTED")
+        assert conn.reply_metrics.orphaned_replies == 2
+
+        seventh = get_channel(7)
+        await asyncio.sleep(0)
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.INVALID_PARAMETER))
+        assert await seventh == MessageReplyError(GetChannelReply, "INVALID_PARAMETER")
+
+        # Abandoned requests are forgotten once their timeout passes again
+        await asyncio.sleep(0.02)
+        assert conn._pending_replies == {}
+
+    asyncio.run(run())
+
+
+def test_in_flight_window():
+    async def run():
+        link = FakeLink()
+        conn = CommandConnection(link, max_in_flight=2)
+
+        tasks = [
+            asyncio.create_task(
+                conn.send_message_expect_reply(GetChannel(i), GetChannelReply)
+            )
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+
+        assert [msg.body.channel_id for msg in link.sent] == [0, 1]
+
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.NOT_SUPPORTED))
+        await tasks[0]
+        await asyncio.sleep(0)
+
+        assert [msg.body.channel_id for msg in link.sent] == [0, 1, 2]
+
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.NOT_SUPPORTED))
+        conn._on_recv(read_rf_ch_reply(p.ReplyStatus.NOT_SUPPORTED))
+
+        assert all(isinstance(r, MessageReplyError) for r in await asyncio.gather(*tasks))
+
+    asyncio.run(run())
+
+
+def event_notification(event_type: p.EventType, event: p.Event) -> bytes:
+    return p.Message(
+        command_group=p.CommandGroup.BASIC,
+        is_reply=False,
+        command=p.BasicCommand.EVENT_NOTIFICATION,
+        body=p.EventNotificationBody(event_type=event_type, event=event),
+    ).to_bytes()
+
+
+def test_unsubscribed_events_are_skipped():
+    conn = CommandConnection(FakeLink())
+
+    data_rxd = event_notification(p.EventType.DATA_RXD, p.UnknownEvent(data=b'abc'))
+    user_action = event_notification(p.EventType.USER_ACTION, p.UnknownEvent(data=b'abc'))
+
+    assert p.peek_event_type(data_rxd) == p.EventType.DATA_RXD
+    assert p.peek_event_type(read_rf_ch_reply(p.ReplyStatus.SUCCESS).to_bytes()) is None
+
+    assert not conn._wants_message(data_rxd)
+
+    remove_status = conn.add_event_handler(lambda _: None, [StatusChangedEvent])
+    remove_unknown = conn.add_event_handler(lambda _: None, [UnknownProtocolMessage])
+
+    assert not conn._wants_message(data_rxd)
+    assert conn._wants_message(user_action)
+
+    remove_unknown()
+    assert not conn._wants_message(user_action)
+
+    remove_all = conn.add_event_handler(lambda _: None)
+    assert conn._wants_message(data_rxd)
+
+    remove_all()
+    remove_status()
+    assert not conn._wants_message(data_rxd)
+
+    # Replies are always decoded
+    assert conn._wants_message(read_rf_ch_reply(p.ReplyStatus.SUCCESS).to_bytes())
+
+
+def test_handlers_dispatched_by_type():
+    conn = CommandConnection(FakeLink())
+
+    status = p.Message.from_bytes(event_notification(
+        p.EventType.HT_STATUS_CHANGED,
+        p.HTStatusChangedEvent(status=p.StatusExt.from_bytes(bytes(p.StatusExt.length() // 8))),
+    ))
+    unknown = p.Message.from_bytes(event_notification(
+        p.EventType.USER_ACTION, p.UnknownEvent(data=b'abc')
+    ))
+
+    received: t.List[t.Tuple[str, t.Any]] = []
+
+    def once(msg: t.Any):
+        received.append(("once", msg))
+        remove_once()
+
+    remove_once = conn.add_event_handler(once)
+    conn.add_event_handler(lambda msg: received.append(("status", msg)), [StatusChangedEvent])
+
+    conn._on_recv(status)
+    conn._on_recv(unknown)
+    conn._on_recv(read_rf_ch_reply(p.ReplyStatus.NOT_SUPPORTED))
+
+    assert [(name, type(msg)) for name, msg in received] == [
+        ("once", StatusChangedEvent),
+        ("status", StatusChangedEvent),
+    ]
+    assert set(conn._handlers) == {StatusChangedEvent}
+
+
+def test_event_stream():
+    async def run():
+        conn = CommandConnection(FakeLink())
+
+        def user_action(data: bytes) -> p.Message:
+            return p.Message.from_bytes(event_notification(
+                p.EventType.USER_ACTION, p.UnknownEvent(data=data)
+            ))
+
+        newest = conn.events(maxsize=2, overflow="drop_newest")
+        oldest = conn.events([UnknownProtocolMessage], maxsize=2)
+        status_only = conn.events([StatusChangedEvent])
+
+        for data in (b'a', b'b', b'c'):
+            conn._on_recv(user_action(data))
+
+        await conn.disconnect()
+
+        def event_data(events: t.List[t.Any]) -> t.List[bytes]:
+            return [event.message.body.event.data for event in events]
+
+        assert event_data([event async for event in newest]) == [b'a', b'b']
+        assert event_data([event async for event in oldest]) == [b'b', b'c']
+        assert [event async for event in status_only] == []
+        assert (newest.dropped, oldest.dropped) == (1, 1)
+        assert conn._handlers == {} and conn._event_streams == set()
+
+        # A waiting consumer is woken up by new events and by closing
+        stream = conn.events()
+        consumer = asyncio.create_task(anext(stream))
+        await asyncio.sleep(0)
+        conn._on_recv(user_action(b'd'))
+        assert event_data([await consumer]) == [b'd']
+
+        # Concurrent consumers each get an event, and all end on close
+        consumers = [asyncio.create_task(anext(stream)) for _ in range(3)]
+        await asyncio.sleep(0)
+        conn._on_recv(user_action(b'e'))
+        await asyncio.sleep(0)
+        assert sum(consumer.done() for consumer in consumers) == 1
+
+        stream.close()
+        results = await asyncio.gather(*consumers, return_exceptions=True)
+        assert sum(isinstance(r, StopAsyncIteration) for r in results) == 2
+
+    asyncio.run(run())
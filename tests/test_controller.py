@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import dataclasses
+import typing as t
+import pytest
+
+from benlink import protocol as p
+from benlink.command import (
+    BeaconSettings,
+    Channel,
+    ChannelChangedEvent,
+    DCS,
+    DeviceInfo,
+    EventHandler,
+    EventMessage,
+    Settings,
+    SettingsChangedEvent,
+    Status,
+)
+from benlink.controller import (
+    ChannelNotLoadedError,
+    FileRadioStateCache,
+    RadioController,
+    RadioState,
+    RadioStateCacheKey,
+)
+
+
+def zeroed(cls: t.Any) -> t.Any:
+    return cls.from_bytes(bytes(cls.length() // 8))
+
+
+class FakeConnection:
+    n_channels: int
+    in_flight: int
+    max_in_flight: int
+    requests: t.List[str]
+    gates: t.Dict[str, asyncio.Event]
+    failures: t.Set[str]
+
+    def __init__(self, n_channels: int, channel_window: int = 4):
+        self.n_channels = n_channels
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+        self.gates = {}
+        self.failures = set()
+        # Like CommandConnection's window of in-flight requests per command
+        self._channel_window = asyncio.Semaphore(channel_window)
+
+    async def _request(self, name: str, value: t.Any):
+        self.requests.append(name)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0)
+            if name in self.gates:
+                await self.gates[name].wait()
+            if name in self.failures:
+                raise ValueError(f"{name} failed")
+        finally:
+            self.in_flight -= 1
+        return value
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+    async def get_device_info(self) -> DeviceInfo:
+        device_info = DeviceInfo.from_protocol(zeroed(p.DevInfo))
+        return await self._request(
+            "device_info", device_info.model_copy(update=dict(channel_count=self.n_channels))
+        )
+
+    async def get_channel(self, channel_id: int) -> Channel:
+        async with self._channel_window:
+            return await self._request(f"channel {channel_id}", Channel.model_construct(channel_id=channel_id))
+
+    async def set_channel(self, channel: Channel) -> None:
+        if channel.name == "fail":
+            raise ValueError("write failed")
+        await self._request(f"set channel {channel.channel_id}", None)
+
+    async def set_settings(self, settings: Settings) -> None:
+        await self._request("set settings", None)
+
+    async def get_settings(self) -> Settings:
+        return await self._request("settings", Settings.model_construct())
+
+    async def get_beacon_settings(self) -> BeaconSettings:
+        return await self._request("beacon_settings", BeaconSettings.model_construct())
+
+    async def get_status(self) -> Status:
+        return await self._request("status", Status.model_construct())
+
+    async def enable_event(self, event_type: str) -> None:
+        pass
+
+    def add_event_handler(
+        self,
+        handler: EventHandler,
+        event_types: t.Iterable[t.Type[EventMessage]] | None = None,
+    ) -> t.Callable[[], None]:
+        return lambda: None
+
+
+def test_hydrate_concurrently():
+    async def run():
+        conn = FakeConnection(n_channels=10)
+        radio = RadioController(t.cast(t.Any, conn))
+
+        # A slow reply holds one place in the window, not a whole batch
+        conn.gates["channel 0"] = asyncio.Event()
+
+        progress: t.List[t.Tuple[int, int]] = []
+        connecting = asyncio.create_task(
+            radio.connect(lambda done, total: progress.append((done, total)))
+        )
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert "channel 9" in conn.requests and not connecting.done()
+
+        conn.gates["channel 0"].set()
+        await connecting
+
+        assert [c.channel_id for c in radio.channels] == list(range(10))
+        assert conn.max_in_flight == 4 + 3
+        assert progress == [(i, 14) for i in range(1, 15)]
+
+    asyncio.run(run())
+
+
+def test_hydrate_failure_cancels_reads():
+    async def run():
+        conn = FakeConnection(n_channels=10, channel_window=1)
+        conn.failures.add("channel 2")
+        radio = RadioController(t.cast(t.Any, conn))
+
+        with pytest.raises(ValueError, match="channel 2 failed"):
+            await radio.connect()
+
+        # The remaining channel reads were cancelled, not left running
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert conn.in_flight == 0
+        assert "channel 5" not in conn.requests
+
+    asyncio.run(run())
+
+
+def test_file_state_cache(tmp_path: t.Any):
+    device_info = DeviceInfo.from_protocol(zeroed(p.DevInfo))
+    channel = Channel.from_protocol(zeroed(p.RfCh))
+
+    state = RadioState(
+        device_info=device_info,
+        beacon_settings=BeaconSettings.from_protocol(zeroed(p.BSSSettingsV2)),
+        status=Status.from_protocol(zeroed(p.StatusExt)),
+        settings=Settings.from_protocol(zeroed(p.Settings)),
+        channels=[channel, channel.model_copy(update=dict(tx_sub_audio=DCS(23)))],
+    )
+
+    cache = FileRadioStateCache(tmp_path / "cache")
+    key = RadioStateCacheKey.from_device_info("00:11:22:33:44:55", device_info)
+
+    assert cache.load(key) is None
+    cache.store(key, state)
+    assert cache.load(key) == state
+    assert cache.load(key._replace(firmware_version=key.firmware_version + 1)) is None
+
+
+class MemoryStateCache:
+    states: t.Dict[RadioStateCacheKey, RadioState]
+
+    def __init__(self):
+        self.states = {}
+
+    def load(self, key: RadioStateCacheKey) -> RadioState | None:
+        state = self.states.get(key)
+        return None if state is None else copy.deepcopy(state)
+
+    def store(self, key: RadioStateCacheKey, state: RadioState) -> None:
+        self.states[key] = copy.deepcopy(state)
+
+
+def test_cached_state_revalidated():
+    async def run():
+        cache = MemoryStateCache()
+
+        radio = RadioController(
+            t.cast(t.Any, FakeConnection(n_channels=3)), state_cache=cache, device_uuid="radio"
+        )
+        await radio.connect()
+        await radio.disconnect()
+
+        (key, state), = cache.states.items()
+        assert len(state.channels) == 3
+
+        # A reconnect serves the cached channels, and re-reads them in the
+        # background. Channels missing from the cache are read right away
+        cache.states[key] = dataclasses.replace(state, channels=state.channels[:1])
+
+        conn = FakeConnection(n_channels=3)
+        radio = RadioController(t.cast(t.Any, conn), state_cache=cache, device_uuid="radio")
+        await radio.connect()
+        assert [c.channel_id for c in radio.channels] == [0, 1, 2]
+        assert "channel 0" not in conn.requests
+
+        assert radio._revalidate_task is not None
+        await radio._revalidate_task
+        assert [conn.requests.count(f"channel {i}") for i in range(3)] == [1, 1, 1]
+        assert len(cache.states[key].channels) == 3
+
+    asyncio.run(run())
+
+
+def test_cached_lazy_state():
+    async def run():
+        cache = MemoryStateCache()
+
+        radio = RadioController(
+            t.cast(t.Any, FakeConnection(n_channels=3)), state_cache=cache, device_uuid="radio"
+        )
+        await radio.connect()
+        await radio.disconnect()
+
+        # As cached by a session with lazy_channels
+        (key, state), = cache.states.items()
+        cache.states[key] = dataclasses.replace(state, channels=[state.channels[0], None, None])
+
+        # Channels fetched on demand while the cached ones are re-read are kept
+        radio = RadioController(
+            t.cast(t.Any, FakeConnection(n_channels=3)),
+            state_cache=cache, device_uuid="radio", lazy_channels=True,
+        )
+        await radio.connect()
+        assert len(radio.channels.loaded()) == 1
+        assert radio._revalidate_task is not None
+        await asyncio.gather(radio._revalidate_task, radio.get_channel(2))
+        assert [c.channel_id for c in radio.channels.loaded()] == [0, 2]
+
+        # Without lazy_channels, all channels are loaded on connect, even if
+        # the cached state has channels missing
+        radio = RadioController(
+            t.cast(t.Any, FakeConnection(n_channels=3)), state_cache=cache, device_uuid="radio"
+        )
+        await radio.connect()
+        assert [c.channel_id for c in radio.channels] == [0, 1, 2]
+        assert radio._revalidate_task is not None
+        await radio._revalidate_task
+        assert [c.channel_id for c in radio.channels] == [0, 1, 2]
+
+    asyncio.run(run())
+
+
+def test_revalidation_keeps_newer_changes():
+    class SlowStatusConnection(FakeConnection):
+        status_read: asyncio.Event
+
+        async def get_status(self) -> Status:
+            await self.status_read.wait()
+            return await super().get_status()
+
+    async def run():
+        cache = MemoryStateCache()
+
+        radio = RadioController(
+            t.cast(t.Any, FakeConnection(n_channels=3)), state_cache=cache, device_uuid="radio"
+        )
+        await radio.connect()
+        await radio.disconnect()
+
+        conn = SlowStatusConnection(n_channels=3)
+        conn.status_read = asyncio.Event()
+        radio = RadioController(t.cast(t.Any, conn), state_cache=cache, device_uuid="radio")
+        await radio.connect()
+
+        # Changed while the radio is being re-read
+        await radio.set_channel(1, name="new")
+        settings = Settings.from_protocol(zeroed(p.Settings))
+        radio._on_event_message(SettingsChangedEvent(settings))
+
+        conn.status_read.set()
+        assert radio._revalidate_task is not None
+        await radio._revalidate_task
+
+        assert radio.channels[1].name == "new"
+        assert radio.settings is settings
+        (state,) = cache.states.values()
+        assert state.channels[1] is not None and state.channels[1].name == "new"
+
+    asyncio.run(run())
+
+
+def test_lazy_channels():
+    async def run():
+        conn = FakeConnection(n_channels=20)
+        radio = RadioController(t.cast(t.Any, conn), lazy_channels=True)
+
+        await radio.connect()
+        assert conn.requests == ["device_info", "settings", "beacon_settings", "status"]
+        assert len(radio.channels) == 20
+
+        with pytest.raises(ChannelNotLoadedError):
+            radio.channels[3]
+
+        # Iterating fails up front instead of fetching channel by channel
+        for iterate in (list, lambda v: None in v, lambda v: v.index(None)):
+            with pytest.raises(ChannelNotLoadedError, match="prefetch_channels"):
+                iterate(radio.channels)
+        await asyncio.sleep(0)
+        assert conn.requests.count("channel 0") == 0
+
+        # Concurrent requests for a channel share one fetch
+        a, b = await asyncio.gather(radio.get_channel(3), radio.get_channel(3))
+        assert a is b is radio.channels[3]
+        assert conn.requests.count("channel 3") == 1
+
+        await radio.prefetch_channels(range(5))
+        assert [c.channel_id for c in radio.channels[:5]] == list(range(5))
+        assert conn.requests.count("channel 3") == 1
+
+        radio._on_event_message(ChannelChangedEvent(a.model_copy(update=dict(name="new"))))
+        assert radio.channels[3].name == "new"
+
+        await radio.prefetch_channels()
+        assert len(radio.channels.loaded()) == 20
+        assert list(radio.channels) == radio.channels.loaded()
+        assert radio.channels.index(radio.channels[3]) == 3
+
+    asyncio.run(run())
+
+
+def test_set_channels():
+    async def run():
+        conn = FakeConnection(n_channels=4)
+        radio = RadioController(t.cast(t.Any, conn), lazy_channels=True)
+        await radio.connect()
+
+        await radio.get_channel(0)
+        radio._on_event_message(ChannelChangedEvent(
+            radio.channels[0].model_copy(update=dict(name="same"))
+        ))
+
+        results = await radio.set_channels({
+            0: {"name": "same"},
+            1: {"name": "new"},
+            2: {"name": "fail"},
+            3: {"name": "other"},
+        })
+
+        assert [(r.channel_id, r.changed) for r in results] == [
+            (0, False), (1, True), (2, False), (3, True),
+        ]
+        assert isinstance(results[2].error, ValueError)
+        assert "set channel 0" not in conn.requests
+        assert radio.channels[1].name == "new"
+        assert conn.max_in_flight > 1
+
+    asyncio.run(run())
+
+
+def test_coalesced_settings_writes():
+    async def run():
+        conn = FakeConnection(n_channels=0)
+        radio = RadioController(t.cast(t.Any, conn), write_debounce=0.01)
+        await radio.connect()
+
+        results = await asyncio.gather(
+            radio.set_settings(squelch_level=3),
+            radio.set_settings(mic_gain=2),
+            radio.set_settings(squelch_level=5),
+        )
+
+        assert conn.requests.count("set settings") == 1
+        assert results[0] is results[1] is results[2] is radio.settings
+        assert (radio.settings.squelch_level, radio.settings.mic_gain) == (5, 2)
+
+        await radio.set_settings(mic_gain=1)
+        assert conn.requests.count("set settings") == 2
+
+    asyncio.run(run())
+
+
+def test_coalesced_settings_write_waits_for_previous_write():
+    class SlowWriteConnection(FakeConnection):
+        written: t.List[Settings]
+
+        async def set_settings(self, settings: Settings) -> None:
+            self.written.append(settings)
+            await asyncio.sleep(0.05)
+
+        async def get_settings(self) -> Settings:
+            return Settings.from_protocol(zeroed(p.Settings))
+
+    async def run():
+        conn = SlowWriteConnection(n_channels=0)
+        conn.written = []
+        radio = RadioController(t.cast(t.Any, conn), write_debounce=0.01)
+        await radio.connect()
+
+        first = asyncio.create_task(radio.set_settings(squelch_level=3))
+        # Lands while the first write is still in progress
+        await asyncio.sleep(0.03)
+        second = asyncio.create_task(radio.set_settings(mic_gain=2))
+
+        await asyncio.gather(first, second)
+
+        assert [(s.squelch_level, s.mic_gain) for s in conn.written] == [(3, 0), (3, 2)]
+        assert (radio.settings.squelch_level, radio.settings.mic_gain) == (3, 2)
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import typing as t
+
+from benlink.command import CommandConnection
+from benlink.link import RfcommCommandLink
+from benlink.protocol import (
+    BasicCommand,
+    CommandGroup,
+    GaiaDeframer,
+    GaiaFrame,
+    GaiaFlags,
+    Message,
+    ReadRFChBody,
+    gaia_checksum,
+)
+
+
+def make_frame(data: bytes, flags: GaiaFlags = GaiaFlags.NONE):
+    frame = GaiaFrame(
+        flags=GaiaFlags.NONE,
+        n_bytes_payload=len(data) - 4,
+        data=data,
+    ).to_bytes()
+
+    if flags & GaiaFlags.CHECKSUM:
+        frame = frame[:2] + bytes([flags]) + frame[3:]
+        frame += bytes([gaia_checksum(frame)])
+
+    return frame
+
+
+def test_deframer_split_reads():
+    frames = [make_frame(bytes([0, 2, 0, i]) + b'payload' * i) for i in range(5)]
+    stream = b''.join(frames)
+
+    for chunk_size in (1, 2, 3, 7, len(stream)):
+        deframer = GaiaDeframer()
+        out: list[bytes] = []
+        for i in range(0, len(stream), chunk_size):
+            out += deframer.feed(stream[i:i+chunk_size])
+        assert out == [GaiaFrame.from_bytes(f).data for f in frames]
+
+
+def test_deframer_garbage_and_checksum_flag():
+    frame = make_frame(b'\x00\x02\x00\x01abc')
+    frame_cs = make_frame(b'\x00\x02\x00\x02', GaiaFlags.CHECKSUM)
+
+    deframer = GaiaDeframer()
+    assert deframer.feed(b'\x12\xff\x00' + frame + b'\xff') == [b'\x00\x02\x00\x01abc']
+    assert deframer.feed(frame_cs[1:]) == [b'\x00\x02\x00\x02']
+    assert deframer.feed(b'') == []
+
+
+def test_deframer_checksum():
+    frame = make_frame(b'\x00\x02\x00\x01abc', GaiaFlags.CHECKSUM)
+    assert GaiaFrame.from_bytes(frame).checksum == gaia_checksum(frame[:-1])
+
+    corrupted = frame[:-1] + bytes([frame[-1] ^ 1])
+
+    deframer = GaiaDeframer()
+    assert deframer.feed(corrupted + frame) == [b'\x00\x02\x00\x01abc']
+    assert deframer.feed(corrupted) == []
+    assert deframer.feed(frame) == [b'\x00\x02\x00\x01abc']
+
+    deframer = GaiaDeframer(verify_checksum=False)
+    assert deframer.feed(corrupted) == [b'\x00\x02\x00\x01abc']
+
+
+def test_link_sends_checksum():
+    sent: list[bytes] = []
+
+    async def send_bytes(data: bytes) -> None:
+        sent.append(data)
+
+    msg = Message(
+        command_group=CommandGroup.BASIC,
+        is_reply=False,
+        command=BasicCommand.READ_RF_CH,
+        body=ReadRFChBody(channel_id=3),
+    )
+
+    for checksum in (False, True):
+        connection = CommandConnection.new_rfcomm("00:11:22:33:44:55", channel=1, checksum=checksum)
+        link = t.cast(RfcommCommandLink, connection._link)
+        link.send_bytes = send_bytes  # type: ignore
+        asyncio.run(link.send(msg))
+
+    plain, with_checksum = sent
+    assert GaiaFrame.from_bytes(plain).checksum is None
+    assert GaiaFrame.from_bytes(with_checksum).checksum == gaia_checksum(with_checksum[:-1])
+
+    # The deframer drops frames that fail the check
+    deframer = GaiaDeframer()
+    assert deframer.feed(with_checksum) == [msg.to_bytes()]
+    assert deframer.feed(with_checksum[:-1] + bytes([with_checksum[-1] ^ 1])) == []